@@ -2,9 +2,13 @@ from typing import Callable
 
 
 class TsFile:
-    def __init__(self, hash: int, read_func: Callable[[], bytes]):
+    def __init__(
+        self, hash: int, read_func: Callable[[], bytes], crc: int | None = None
+    ):
         self.hash = hash
         self._read_func = read_func
+        # Checksum of the contents from the archive entry, if available.
+        self.crc = crc
 
         self.path: str | None = None
         self.underlying_paths: list[str] = []
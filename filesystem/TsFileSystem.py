@@ -1,12 +1,15 @@
+import sys
 from pathlib import Path
-from typing import BinaryIO
+from typing import BinaryIO, Iterable
 
 # SCS uses an old version of CityHash,
 # so we need to use this instead of the cityhash pip package.
 from clickhouse_cityhash.cityhash import CityHash64
 
+from utils import TsMemory
 from .TsDirectory import TsDirectory
 from .TsFile import TsFile
+from .TsHashIndex import TsHashIndex
 from .parsers.ScsFileParser import ScsFileParser
 from .parsers.ZipFileParser import ZipFileParser
 
@@ -17,10 +20,12 @@ class TsFileSystem:
     File structure is extracted from .scs files,
     either as custom SCS hash archives or ZIP archives.
     Files from the base game and mod are loaded in order.
+    Directories and files are indexed by path hash in dicts,
+    which can optionally be compacted into sorted hash arrays with build_hash_index().
     """
 
-    _dirs: dict[int, TsDirectory] = {}
-    _files: dict[int, TsFile] = {}
+    _dirs: dict[int, TsDirectory] | TsHashIndex[TsDirectory] = {}
+    _files: dict[int, TsFile] | TsHashIndex[TsFile] = {}
     _file_buffers: list[BinaryIO] = []
 
     @classmethod
@@ -44,13 +49,16 @@ class TsFileSystem:
         # Hash is calculated without leading or trailing slashes.
         dir_hash: int = CityHash64(dir_path.strip("/\\"))
         dir = cls._dirs.get(dir_hash)
+        if not dir:
+            return None
 
         files = []
         for file_name in dir.file_names:
             if file_filter in file_name:
                 file_path = f"{dir_path}{file_name}" if dir_path else f"/{file_name}"
                 file = cls.get_file(file_path)
-                files.append(file)
+                if file:
+                    files.append(file)
         return files
 
     @classmethod
@@ -71,17 +79,51 @@ class TsFileSystem:
         # Hash is calculated without leading or trailing slashes.
         file_hash: int = CityHash64(file_path.strip("/\\"))
         file = cls._files.get(file_hash)
+        if not file:
+            return None
 
         # File names are hashed, so we didn't know the name beforehand.
         file.path = file_path
         return file
 
+    @classmethod
+    def get_files_by_hash(cls, hashes: Iterable[int]) -> list[TsFile | None]:
+        """
+        Get many files in the file system by their path hashes at once.
+        The paths of the files are not set.
+
+        Args:
+            hashes: The hash of each file path.
+                Hashes are calculated without leading or trailing slashes.
+
+        Returns:
+            The file for each hash (or None if not found), in order.
+        """
+        if isinstance(cls._files, TsHashIndex):
+            return cls._files.get_many(hashes)
+        return [cls._files.get(file_hash) for file_hash in hashes]
+
+    @classmethod
+    def build_hash_index(cls) -> None:
+        """
+        Compact the directory and file indexes into sorted hash arrays (TsHashIndex).
+        This is opt-in: it makes the index tables about 2.5x smaller,
+        but lookups about 6x slower, and the files themselves are not shrunk.
+        Call this after mounting all source files, when lookup memory matters
+        more than lookup time. Mounting another source file converts them back to dicts.
+        """
+        if not isinstance(cls._dirs, TsHashIndex):
+            cls._dirs = TsHashIndex(cls._dirs)
+        if not isinstance(cls._files, TsHashIndex):
+            cls._files = TsHashIndex(cls._files)
+
     @classmethod
     def mount_source_dir(cls, path: Path) -> None:
         R"""
         Mount a directory which contains .scs files to be parsed.
         This should be the installation location of the game
         (e.g. C:\Program Files (x86)\Steam\steamapps\common\Euro Truck Simulator 2).
+        Archives are mounted in the order given by source_file_priority().
 
         Notes:
             Any file buffers opened are not closed here.
@@ -99,10 +141,31 @@ class TsFileSystem:
         if not path.exists():
             raise FileNotFoundError(f"Could not find source directory '{path}'.")
 
-        # Parse each .scs file.
-        scs_files = path.glob("*.scs")
-        for file in scs_files:
-            cls.mount_source_file(file)
+        for scs_file in sorted(path.glob("*.scs"), key=cls.source_file_priority):
+            cls.mount_source_file(scs_file)
+
+    @staticmethod
+    def source_file_priority(path: Path) -> tuple[int, str]:
+        """
+        Get the sort key for mounting a .scs file, matching the game's load order.
+        Base game archives (base*.scs) are mounted first, then other archives,
+        then DLC archives (dlc_*.scs), each group in alphabetical order.
+        Files mounted later override files mounted earlier.
+
+        Args:
+            path: The path to the source file.
+
+        Returns:
+            The sort key.
+        """
+        name = path.name.lower()
+        if name.startswith("base"):
+            group = 0
+        elif name.startswith("dlc_"):
+            group = 2
+        else:
+            group = 1
+        return group, name
 
     @classmethod
     def mount_source_file(cls, path: Path) -> None:
@@ -123,19 +186,34 @@ class TsFileSystem:
         Raises:
             FileNotFoundError: Source file could not be found.
         """
+        dirs, files = cls._parse_source_file(path)
+        cls._merge_source_file(dirs, files)
+
+    @classmethod
+    def _parse_source_file(
+        cls, path: Path
+    ) -> tuple[dict[int, TsDirectory], dict[int, TsFile]]:
         if not path.exists():
             raise FileNotFoundError(f"Could not find source file '{path}'.")
 
-        # if "base.scs" not in path.name:
-        #     return
-
         f = path.open(mode="rb")
+        cls._file_buffers.append(f)
         try:
             dirs, files = ScsFileParser.parse(f)
             print(f"Parsed {path} as .scs file")
         except AssertionError:
             dirs, files = ZipFileParser.parse(f)
             print(f"Parsed {path} as .zip file")
+        return dirs, files
+
+    @classmethod
+    def _merge_source_file(
+        cls, dirs: dict[int, TsDirectory], files: dict[int, TsFile]
+    ) -> None:
+        if isinstance(cls._dirs, TsHashIndex):
+            cls._dirs = dict(cls._dirs.items())
+        if isinstance(cls._files, TsHashIndex):
+            cls._files = dict(cls._files.items())
 
         for dir_hash, dir in dirs.items():
             existing_dir = cls._dirs.get(dir_hash)
@@ -156,6 +234,23 @@ class TsFileSystem:
 
             cls._files[file_hash] = file
 
+    @classmethod
+    def memory_usage(cls) -> dict[str, int]:
+        """
+        Estimate the memory held by the mounted directory and file indexes.
+        Entries are sampled, so this is cheap enough to call often.
+        File contents are read from the archives on demand, and are not held.
+
+        Returns:
+            The bytes held by each part of the file system.
+        """
+        return {
+            "dir_index": _index_size(cls._dirs, boxed_keys=True),
+            "dirs": TsMemory.sampled_size(cls._dirs.values(), len(cls._dirs)),
+            "file_index": _index_size(cls._files, boxed_keys=False),
+            "files": TsMemory.sampled_size(cls._files.values(), len(cls._files)),
+        }
+
     @classmethod
     def close_file_buffers(cls) -> None:
         """
@@ -163,3 +258,13 @@ class TsFileSystem:
         """
         for f in cls._file_buffers:
             f.close()
+
+
+def _index_size(index: dict | TsHashIndex, boxed_keys: bool) -> int:
+    # Hash table or sorted arrays, and the boxed hashes of a dict
+    # unless they are shared with the values (e.g. TsFile.hash).
+    if isinstance(index, TsHashIndex):
+        return index.memory_usage()
+    if boxed_keys:
+        return sys.getsizeof(index) + len(index) * sys.getsizeof(2**63)
+    return sys.getsizeof(index)
@@ -27,12 +27,12 @@ class _Header(StructDataClass):
 
 @dataclass
 class _Entry(StructDataClass):
-    struct = Struct("<QQI4xII")
+    struct = Struct("<QQIIII")
 
     hash: int  # u8
     ofs_body: int  # u8
     flags: int  # u4
-    # crc: int  # u4
+    crc: int  # u4
     len_body_uncompressed: int  # u4
     len_body_compressed: int  # u4
 
@@ -90,6 +90,7 @@ class ScsFileParser:
                 files[entry.hash] = TsFile(
                     entry.hash,
                     lambda f=f, entry=entry: ScsFileParser._read_entry_body(f, entry),
+                    entry.crc,
                 )
                 files[entry.hash].underlying_paths.append(f.name)
 
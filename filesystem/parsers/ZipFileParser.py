@@ -33,7 +33,7 @@ class _EndOfCentralDir(StructDataClass):
 
 @dataclass
 class _CentralDirEntry(StructDataClass):
-    struct = Struct("<2s2s16xIIHHH8xI")
+    struct = Struct("<2s2s12xIIIHHH8xI")
 
     magic: str  # 'PK'
     section_type: bytes  # 0x01 0x02
@@ -42,7 +42,7 @@ class _CentralDirEntry(StructDataClass):
     # flags: int  # u2
     # compression_method: int  # u2 (enum)
     # file_mod_time: int  # u4 (dos_datetime)
-    # crc32: int  # u4
+    crc32: int  # u4
     len_body_compressed: int  # u4
     len_body_uncompressed: int  # u4
     len_file_name: int  # u2
@@ -162,6 +162,7 @@ class ZipFileParser:
                     lambda f=f, entry=entry, ofs_body=ofs_body: ZipFileParser._read_entry_body(
                         f, entry, ofs_body
                     ),
+                    entry.crc32,
                 )
                 files[file_hash].underlying_paths.append(f.name)
                 parent_dir.file_names.add(file_tail)
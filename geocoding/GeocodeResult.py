@@ -0,0 +1,22 @@
+from dataclasses import dataclass
+
+from sectors.TsCityItem import TsCityItem
+from sectors.TsCompanyItem import TsCompanyItem
+from units import TsCity
+
+
+@dataclass
+class GeocodeResult:
+    """
+    The city and company nearest to a world position.
+    """
+
+    city_item: TsCityItem | None  # None if no city area is in range
+    city: TsCity | None  # city unit of city_item, if it was parsed
+    city_distance: float  # m, to the city area (0 if inside, inf if none)
+    company: TsCompanyItem | None  # None if no company is in range
+    company_distance: float  # m, to the company node (inf if none)
+
+    @property
+    def in_city(self) -> bool:
+        return self.city_distance == 0.0
@@ -0,0 +1,188 @@
+import math
+from array import array
+from typing import Iterable
+
+from sectors import TsItemIndex, TsSector
+from sectors.TsCityItem import TsCityItem
+from sectors.TsCompanyItem import TsCompanyItem
+from sectors.TsSector import TsItemEnum
+from units import TsCity
+from .GeocodeResult import GeocodeResult
+
+
+class TsGeocoder:
+    """
+    Finds the city and company nearest to world positions (reverse geocoding).
+    City areas and company positions are kept in separate TsItemIndex trees.
+    Batches are grouped by grid cell, so each cell searches its trees only once.
+    """
+
+    def __init__(
+        self,
+        sectors: Iterable[TsSector],
+        cities: Iterable[TsCity] = (),
+        cell_size: float = 500.0,
+    ):
+        """
+        Args:
+            sectors: The parsed sectors (not headers_only).
+            cities: The city units, joined to city items by token.
+            cell_size: Width of the grid cells that batches are grouped by in m.
+        """
+        self.cell_size = cell_size
+        self._cities_by_token = {city.token: city for city in cities}
+
+        sectors = list(sectors)
+        self._city_items: dict[int, TsCityItem] = {}
+        self._company_items: dict[int, TsCompanyItem] = {}
+        for sector in sectors:
+            self._city_items.update((city.uid, city) for city in sector.cities)
+            self._company_items.update((c.uid, c) for c in sector.companies)
+
+        # Items are placed at nodes, which may be stored in a neighboring sector.
+        node_uids = {city.node_uid for city in self._city_items.values()}
+        node_uids.update(c.node_uid for c in self._company_items.values())
+        positions: dict[int, tuple[float, float]] = {}
+        for sector in sectors:
+            for node_uid in node_uids & sector.nodes.keys():
+                node = sector.nodes[node_uid]
+                positions[node_uid] = (node.x, node.z)
+
+        # (min_x, min_z, max_x, max_z) of each indexed item, rounded to f4
+        # like the index, so batches get the same distances as lookup().
+        self._bounds: dict[int, tuple[float, float, float, float]] = {}
+        for uid, city in self._city_items.items():
+            position = positions.get(city.node_uid)
+            if position:
+                x, z = position
+                bounds = array("f", (x, z, x + city.width, z + city.height))
+                self._bounds[uid] = tuple(bounds)
+        for uid, company in self._company_items.items():
+            position = positions.get(company.node_uid)
+            if position:
+                self._bounds[uid] = tuple(array("f", (*position, *position)))
+
+        self._city_index = self._build_index(TsItemEnum.CITY, self._city_items)
+        self._company_index = self._build_index(TsItemEnum.COMPANY, self._company_items)
+
+    def _build_index(self, item_type: TsItemEnum, items: dict) -> TsItemIndex:
+        uids = array("Q", (uid for uid in items if uid in self._bounds))
+        bounds = array("f")
+        for uid in uids:
+            bounds.extend(self._bounds[uid])
+        return TsItemIndex(array("B", [item_type.value]) * len(uids), uids, bounds)
+
+    def lookup(
+        self, x: float, z: float, max_distance: float = math.inf
+    ) -> GeocodeResult:
+        """
+        Get the city and company nearest to a position.
+
+        Args:
+            x: World x position.
+            z: World z position.
+            max_distance: Maximum distance to a city area or company in m.
+
+        Returns:
+            The result.
+        """
+        city = self._city_index.nearest(x, z, max_distance=max_distance)
+        company = self._company_index.nearest(x, z, max_distance=max_distance)
+        return self._result(city, company)
+
+    def lookup_many(
+        self, positions: Iterable[tuple[float, float]], max_distance: float = math.inf
+    ) -> list[GeocodeResult]:
+        """
+        Get the city and company nearest to each of many positions.
+        Positions that are close together share their tree searches.
+
+        Args:
+            positions: World (x, z) positions.
+            max_distance: Maximum distance to a city area or company in m.
+
+        Returns:
+            The result for each position, in order.
+        """
+        positions = list(positions)
+        cells: dict[tuple[int, int], list[int]] = {}
+        for i, (x, z) in enumerate(positions):
+            key = (math.floor(x / self.cell_size), math.floor(z / self.cell_size))
+            cells.setdefault(key, []).append(i)
+
+        results: list[GeocodeResult | None] = [None] * len(positions)
+        for key, indices in cells.items():
+            cell_positions = [positions[i] for i in indices]
+            cities = self._nearest_in_cell(
+                self._city_index, key, cell_positions, max_distance
+            )
+            companies = self._nearest_in_cell(
+                self._company_index, key, cell_positions, max_distance
+            )
+            for i, city, company in zip(indices, cities, companies):
+                results[i] = self._result(city, company)
+        return results
+
+    def _nearest_in_cell(
+        self,
+        index: TsItemIndex,
+        key: tuple[int, int],
+        positions: list[tuple[float, float]],
+        max_distance: float,
+    ) -> list[tuple[int, float] | None]:
+        if len(positions) == 1:
+            x, z = positions[0]
+            return [index.nearest(x, z, max_distance=max_distance)]
+
+        # Every position in the cell is within half_diagonal of its center,
+        # so its nearest item is within nearest_to_center + half_diagonal of it.
+        # Only the items within that radius of the cell need to be compared.
+        half_size = 0.5 * self.cell_size
+        half_diagonal = math.sqrt(2) * half_size
+        center_x = (key[0] + 0.5) * self.cell_size
+        center_z = (key[1] + 0.5) * self.cell_size
+        nearest = index.nearest(
+            center_x, center_z, max_distance=max_distance + half_diagonal
+        )
+        if nearest is None:
+            return [None] * len(positions)
+
+        radius = half_size + min(nearest[1] + half_diagonal, max_distance)
+        # Scanned by UID, so ties go to the lowest UID as in TsItemIndex.nearest().
+        candidates = [
+            self._bounds[uid] + (uid,)
+            for uid in sorted(
+                index.query(
+                    center_x - radius,
+                    center_z - radius,
+                    center_x + radius,
+                    center_z + radius,
+                )
+            )
+        ]
+
+        results = []
+        for x, z in positions:
+            best_distance, best_uid = math.inf, 0
+            for min_x, min_z, max_x, max_z, uid in candidates:
+                dx = max(min_x - x, 0.0, x - max_x)
+                dz = max(min_z - z, 0.0, z - max_z)
+                distance = math.hypot(dx, dz)
+                if distance < best_distance:
+                    best_distance, best_uid = distance, uid
+            results.append(
+                (best_uid, best_distance) if best_distance <= max_distance else None
+            )
+        return results
+
+    def _result(
+        self, city: tuple[int, float] | None, company: tuple[int, float] | None
+    ) -> GeocodeResult:
+        city_item = self._city_items[city[0]] if city else None
+        return GeocodeResult(
+            city_item,
+            self._cities_by_token.get(city_item.city_token) if city_item else None,
+            city[1] if city else math.inf,
+            self._company_items[company[0]] if company else None,
+            company[1] if company else math.inf,
+        )
@@ -0,0 +1,2 @@
+from .GeocodeResult import GeocodeResult
+from .TsGeocoder import TsGeocoder
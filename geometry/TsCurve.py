@@ -0,0 +1,102 @@
+import math
+from array import array
+from typing import Iterable
+
+# (start x, start z, start tangent x, start tangent z,
+#  end x, end z, end tangent x, end tangent z)
+HermiteCurve = tuple[float, float, float, float, float, float, float, float]
+
+
+class TsCurve:
+    """
+    A static class used to evaluate and simplify curves in the x/z plane.
+    Polylines are flat arrays of (x, z) pairs.
+    """
+
+    @staticmethod
+    def hermite_many(curves: Iterable[HermiteCurve], samples: int) -> list[array]:
+        """
+        Evaluate many cubic Hermite curves at evenly spaced parameters.
+        The basis weights are computed once and shared by every curve.
+
+        Args:
+            curves: The curves to evaluate.
+            samples: Number of points per curve (at least 2).
+
+        Returns:
+            A polyline per curve, with samples points each.
+        """
+        ts = [i / (samples - 1) for i in range(samples)]
+        basis = [
+            (
+                2 * t**3 - 3 * t**2 + 1,
+                t**3 - 2 * t**2 + t,
+                -2 * t**3 + 3 * t**2,
+                t**3 - t**2,
+            )
+            for t in ts
+        ]
+
+        polylines = []
+        for p0x, p0z, m0x, m0z, p1x, p1z, m1x, m1z in curves:
+            polyline = array("d")
+            for h00, h10, h01, h11 in basis:
+                polyline.append(h00 * p0x + h10 * m0x + h01 * p1x + h11 * m1x)
+                polyline.append(h00 * p0z + h10 * m0z + h01 * p1z + h11 * m1z)
+            polylines.append(polyline)
+        return polylines
+
+    @staticmethod
+    def simplify(polyline: array, tolerance: float) -> array:
+        """
+        Simplify a polyline with the Douglas-Peucker algorithm.
+        Straight parts collapse to their end points,
+        while curved parts keep as many points as needed.
+
+        Args:
+            polyline: The polyline to simplify.
+            tolerance: Maximum distance of a removed point from the result in m.
+
+        Returns:
+            The simplified polyline, which keeps the first and last points.
+        """
+        point_count = len(polyline) // 2
+        if point_count <= 2:
+            return array("d", polyline)
+
+        keep = bytearray(point_count)
+        keep[0] = keep[-1] = 1
+        stack = [(0, point_count - 1)]
+        while stack:
+            first, last = stack.pop()
+            ax, az = polyline[2 * first], polyline[2 * first + 1]
+            dx, dz = polyline[2 * last] - ax, polyline[2 * last + 1] - az
+            length = math.hypot(dx, dz)
+
+            max_distance, max_i = -1.0, -1
+            for i in range(first + 1, last):
+                px, pz = polyline[2 * i] - ax, polyline[2 * i + 1] - az
+                if length > 0:
+                    distance = abs(px * dz - pz * dx) / length
+                else:
+                    distance = math.hypot(px, pz)
+                if distance > max_distance:
+                    max_distance, max_i = distance, i
+
+            if max_distance > tolerance:
+                keep[max_i] = 1
+                stack.append((first, max_i))
+                stack.append((max_i, last))
+
+        simplified = array("d")
+        for i in range(point_count):
+            if keep[i]:
+                simplified.extend(polyline[2 * i : 2 * i + 2])
+        return simplified
+
+    @staticmethod
+    def length(polyline: array) -> float:
+        return sum(
+            math.hypot(polyline[i + 2] - polyline[i], polyline[i + 3] - polyline[i + 1])
+            for i in range(0, len(polyline) - 2, 2)
+        )
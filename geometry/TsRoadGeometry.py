@@ -0,0 +1,142 @@
+import math
+import sys
+from array import array
+from typing import Mapping
+
+from sectors import TsSector
+from sectors.TsNode import TsNode
+from .TsCurve import TsCurve
+
+
+class TsRoadGeometry:
+    """
+    Cached polylines of road curves, keyed by road UID.
+    A road is a cubic Hermite curve between its two nodes,
+    with tangents along the node directions scaled by the distance between the nodes.
+    Polylines are tracked per sector, and recomputed when the sector's CRC changes.
+    """
+
+    def __init__(self, samples: int = 16, tolerance: float = 0.1):
+        """
+        Args:
+            samples: Number of points each curve is evaluated at before simplifying.
+            tolerance: Maximum distance of the polyline from the sampled curve in m.
+        """
+        self.samples = samples
+        self.tolerance = tolerance
+
+        self._polylines: dict[int, array] = {}
+        # Maps a sector path to its CRC and road UIDs.
+        self._sector_roads: dict[str | None, tuple[int | None, list[int]]] = {}
+        self._polyline_bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._polylines)
+
+    def update_sector(
+        self, sector: TsSector, nodes: Mapping[int, TsNode] | None = None
+    ) -> None:
+        """
+        Compute the polylines of a sector's roads,
+        unless they are already cached for the same sector contents.
+        All of the sector's curves are evaluated together.
+
+        Args:
+            sector: The parsed sector.
+            nodes: Optional node lookup, for roads ending at nodes in other sectors.
+                Defaults to the sector's own nodes.
+        """
+        cached = self._sector_roads.get(sector.path)
+        if cached and sector.crc is not None and cached[0] == sector.crc:
+            return
+        self.invalidate_sector(sector.path)
+
+        nodes = nodes or sector.nodes
+        road_uids: list[int] = []
+        curves = []
+        for road in sector.roads:
+            node0 = nodes.get(road.node0_uid)
+            node1 = nodes.get(road.node1_uid)
+            if not node0 or not node1:
+                continue
+
+            chord = math.hypot(node1.x - node0.x, node1.z - node0.z)
+            (f0x, f0z), (f1x, f1z) = node0.forward, node1.forward
+            road_uids.append(road.uid)
+            curves.append(
+                (
+                    node0.x,
+                    node0.z,
+                    f0x * chord,
+                    f0z * chord,
+                    node1.x,
+                    node1.z,
+                    f1x * chord,
+                    f1z * chord,
+                )
+            )
+
+        for road_uid, polyline in zip(
+            road_uids, TsCurve.hermite_many(curves, self.samples)
+        ):
+            polyline = TsCurve.simplify(polyline, self.tolerance)
+            self._polylines[road_uid] = polyline
+            self._polyline_bytes += sys.getsizeof(polyline)
+        self._sector_roads[sector.path] = (sector.crc, road_uids)
+
+    def invalidate_sector(self, sector_path: str | None) -> None:
+        """
+        Remove the cached polylines of a sector's roads.
+
+        Args:
+            sector_path: The path of the sector file.
+        """
+        _, road_uids = self._sector_roads.pop(sector_path, (None, []))
+        for road_uid in road_uids:
+            polyline = self._polylines.pop(road_uid, None)
+            if polyline is not None:
+                self._polyline_bytes -= sys.getsizeof(polyline)
+
+    def evict(self) -> int | None:
+        """
+        Remove the cached polylines of the sector that was computed first.
+        They are computed again by update_sector() when needed.
+
+        Returns:
+            The bytes of polylines released, or None if no sectors are cached.
+        """
+        if not self._sector_roads:
+            return None
+        polyline_bytes = self._polyline_bytes
+        self.invalidate_sector(next(iter(self._sector_roads)))
+        return polyline_bytes - self._polyline_bytes
+
+    def memory_usage(self) -> dict[str, int]:
+        """
+        Get the memory held by the cached polylines.
+
+        Returns:
+            The bytes held by the polylines and the dicts that index them.
+        """
+        return {
+            "polylines": self._polyline_bytes,
+            "index": sys.getsizeof(self._polylines)
+            + sys.getsizeof(self._sector_roads)
+            + sum(sys.getsizeof(uids) for _, uids in self._sector_roads.values()),
+        }
+
+    def get(self, road_uid: int) -> array | None:
+        """
+        Get the polyline of a road.
+
+        Args:
+            road_uid: The road item UID.
+
+        Returns:
+            The (x, z) pairs of the polyline, or None if the road is not cached.
+        """
+        return self._polylines.get(road_uid)
+
+    def length(self, road_uid: int) -> float | None:
+        polyline = self._polylines.get(road_uid)
+        return TsCurve.length(polyline) if polyline is not None else None
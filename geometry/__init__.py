@@ -0,0 +1,2 @@
+from .TsCurve import TsCurve
+from .TsRoadGeometry import TsRoadGeometry
@@ -1,17 +1,31 @@
 import time
 from pathlib import Path
+from typing import Iterable
 
 from filesystem import TsFileSystem
-from sectors import TsSector
-from units import TsCity
+from routing import TsRoadGraph
+from sectors import TsSector, TsSectorCache, TsSectorCatalog
+from tiles import TsTileExporter
+from units import TsCity, TsFerryConnection, TsPrefabDescriptor
+from utils import TsMemoryBudget
 
 game_path = Path(
     R"C:\Program Files (x86)\Steam\steamapps\common\Euro Truck Simulator 2"
 )
 mod_path = Path(R"C:\Users\dwang\Documents\Euro Truck Simulator 2\mod")
+sector_cache_path = Path("sector_cache")
+tile_path = Path("map_tiles")
+
+# Approximate memory limit of the parsed sectors, prefab descriptors
+# and road polylines, which are evicted to stay under it.
+# Sectors are streamed into the road graph and tile export,
+# so lower these on small machines.
+memory_budget = TsMemoryBudget(max_bytes=2 * 1024**3)
+max_sector_cache_bytes = 512 * 1024**2
 
 
 cities: list[TsCity] = []
+ferry_connections: list[TsFerryConnection] = []
 
 
 def parse_city_files():
@@ -44,34 +58,78 @@ def parse_city_files():
             cities.append(city)
 
 
+def parse_prefab_files():
+    prefab_files = TsFileSystem.get_files("/def/world/", "prefab")
+    if not prefab_files:
+        raise FileNotFoundError(
+            "Could not find files in directory '/def/world/' that contain 'prefab'."
+        )
+
+    for prefab_file in prefab_files:
+        TsPrefabDescriptor.parse_def_file(prefab_file)
+
+
+def parse_ferry_connections():
+    connection_files = TsFileSystem.get_files("/def/ferry/connection/")
+    if not connection_files:
+        raise FileNotFoundError(
+            "Could not find files in directory '/def/ferry/connection/'."
+        )
+
+    for connection_file in connection_files:
+        ferry_connections.append(TsFerryConnection(connection_file.path))
+
+
 def parse_def_files():
     """
     Parse all definition files.
     """
     parse_city_files()
     # TODO: parse_country_files()
-    # TODO: parse_prefab_files()
+    parse_prefab_files()
     # TODO: parse_road_look_files()
-    # TODO: parse_ferry_connections()
+    parse_ferry_connections()
 
 
-def parse_sector_files():
-    # TODO: Read /map folder to get .mbd file to determine folder to read
-    base_files = TsFileSystem.get_files("/map/europe", ".base")
+def parse_sector_files(
+    bbox: tuple[float, float, float, float] | None = None
+) -> Iterable[TsSector]:
+    """
+    Parse sector files into the sector cache,
+    optionally only those intersecting a world bounding box.
 
-    for base_file in base_files:
-        # if "sec+0017+0010" not in base_file.path:
-        #     continue
+    Args:
+        bbox: Optional (min_x, min_z, max_x, max_z) world bounding box.
 
-        print(f"Parsing .base file: {base_file.path}...")
-        TsSector(base_file)
+    Returns:
+        The sectors, loaded from the sector cache whenever they are iterated.
+    """
+    # TODO: Read /map folder to get .mbd file to determine folder to read
+    sector_catalog = TsSectorCatalog(
+        "/map/europe",
+        max_cache_bytes=max_sector_cache_bytes,
+        sector_cache=TsSectorCache(sector_cache_path),
+        memory_budget=memory_budget,
+    )
+
+    # e.g. bbox=(68000, 40000, 71999, 43999) only parses sec+0017+0010.
+    coords = sector_catalog.coords_in_bbox(*bbox) if bbox else sector_catalog.coords
+    sectors = sector_catalog.stream_sectors(coords)
+    # Parse each sector once, so later passes load them from the sector cache.
+    for _ in sectors:
+        pass
+    return sectors
 
 
 if __name__ == "__main__":
+    memory_budget.register("filesystem", TsFileSystem)
+    memory_budget.register("prefab descriptors", TsPrefabDescriptor)
     try:
         start_time = time.time()
         TsFileSystem.mount_source_dir(game_path)
         # TsFileSystem.mount_source_dir(mod_path)
+        # Optional: smaller file indexes, but slower lookups.
+        # TsFileSystem.build_hash_index()
         end_time = time.time()
         print(f"Mounted source directories in {end_time - start_time:.2f}s.")
 
@@ -81,8 +139,24 @@ if __name__ == "__main__":
         # print(f"Parsed def files in {end_time - start_time:.2f}s.")
 
         start_time = time.time()
-        parse_sector_files()
+        sectors = parse_sector_files()
         end_time = time.time()
         print(f"Parsed sector files in {end_time - start_time:.2f}s.")
+
+        start_time = time.time()
+        road_graph = TsRoadGraph.from_sectors(sectors, ferry_connections)
+        end_time = time.time()
+        print(
+            f"Built road graph with {road_graph.node_count} nodes "
+            f"and {road_graph.edge_count} edges in {end_time - start_time:.2f}s."
+        )
+
+        start_time = time.time()
+        tile_exporter = TsTileExporter(tile_path, memory_budget=memory_budget)
+        tile_count = tile_exporter.export(sectors, workers=None)
+        end_time = time.time()
+        print(f"Exported {tile_count} map tiles in {end_time - start_time:.2f}s.")
+
+        memory_budget.print_report()
     finally:
         TsFileSystem.close_file_buffers()
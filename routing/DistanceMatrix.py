@@ -0,0 +1,42 @@
+from array import array
+from dataclasses import dataclass, field
+
+
+@dataclass
+class DistanceMatrix:
+    """
+    Dense travel distances and times between every source and target node.
+    Unreachable pairs are infinite.
+    """
+
+    source_uids: list[int]
+    target_uids: list[int]
+    distances: list[array]  # f8 rows, one per source, in m
+    durations: list[array]  # f8 rows, one per source, in s
+    elapsed: float  # s, time taken to compute the matrix
+
+    _source_index: dict[int, int] = field(init=False, repr=False)
+    _target_index: dict[int, int] = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self._source_index = {uid: i for i, uid in enumerate(self.source_uids)}
+        self._target_index = {uid: i for i, uid in enumerate(self.target_uids)}
+
+    @property
+    def pair_count(self) -> int:
+        return len(self.source_uids) * len(self.target_uids)
+
+    @property
+    def throughput(self) -> float:
+        """The number of source-target pairs computed per second."""
+        return self.pair_count / self.elapsed if self.elapsed > 0 else float("inf")
+
+    def distance(self, source_uid: int, target_uid: int) -> float:
+        return self.distances[self._source_index[source_uid]][
+            self._target_index[target_uid]
+        ]
+
+    def duration(self, source_uid: int, target_uid: int) -> float:
+        return self.durations[self._source_index[source_uid]][
+            self._target_index[target_uid]
+        ]
@@ -0,0 +1,25 @@
+from dataclasses import dataclass
+
+from units import TsFerryConnection
+
+
+@dataclass
+class FerryCostModel:
+    """
+    Converts ferry connections into road graph edge lengths and travel times.
+    """
+
+    seconds_per_time_unit: float = 60.0  # connection 'time' is in minutes
+    meters_per_distance_unit: float = 1000.0  # connection 'distance' is in km
+    boarding_duration: float = 30 * 60.0  # s, waiting and loading at the port
+    seconds_per_price_unit: float = 0.0  # s, to trade travel time for ticket price
+
+    def length(self, connection: TsFerryConnection) -> float:
+        return connection.distance * self.meters_per_distance_unit
+
+    def duration(self, connection: TsFerryConnection) -> float:
+        return (
+            self.boarding_duration
+            + connection.time * self.seconds_per_time_unit
+            + connection.price * self.seconds_per_price_unit
+        )
@@ -0,0 +1,128 @@
+import math
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from .MatchedPoint import MatchedPoint
+
+if TYPE_CHECKING:
+    from .TsMapMatcher import Candidate, TsMapMatcher
+
+
+@dataclass
+class _Column:
+    timestamp: float
+    x: float
+    z: float
+    candidates: list["Candidate"]
+    scores: list[float]  # best log probability of a path ending at each candidate
+    back: list[int]  # candidate index in the previous column on that path
+
+
+class MapMatchSession:
+    """
+    Incrementally matches one stream of samples (e.g. one vehicle)
+    with a TsMapMatcher.
+    Viterbi decoding runs over a sliding window of samples:
+    once the window is full, the oldest sample is decided and returned.
+    """
+
+    def __init__(self, matcher: "TsMapMatcher", window: int = 10):
+        """
+        Args:
+            matcher: The matcher to get candidates and transitions from.
+            window: Number of samples kept before the oldest one is decided.
+        """
+        self.matcher = matcher
+        self.window = max(1, window)
+        self._columns: list[_Column] = []
+
+    def push(
+        self, x: float, z: float, heading: float | None, timestamp: float
+    ) -> list[MatchedPoint]:
+        """
+        Add a sample to the stream.
+
+        Args:
+            x: World x position.
+            z: World z position.
+            heading: Yaw of the vehicle (same convention as TsNode.yaw),
+                or None if unknown.
+            timestamp: Time of the sample in s.
+
+        Returns:
+            The samples that were decided by this sample, oldest first.
+        """
+        candidates = self.matcher.candidates(x, z, heading)
+        if not candidates:
+            # Off the road network, so the current chain can be decided.
+            return self.flush() + [MatchedPoint(timestamp, -1, 0.0, x, z, math.inf)]
+
+        emissions = [c[5] for c in candidates]
+        if not self._columns:
+            self._columns.append(
+                _Column(timestamp, x, z, candidates, emissions, [-1] * len(emissions))
+            )
+            return self._decide_full_window()
+
+        prev = self._columns[-1]
+        transitions = self.matcher.transition_scores(
+            prev.candidates,
+            candidates,
+            math.hypot(x - prev.x, z - prev.z),
+            timestamp - prev.timestamp,
+        )
+        scores, back = [], []
+        for j, emission in enumerate(emissions):
+            best_i = max(
+                range(len(prev.candidates)),
+                key=lambda i: prev.scores[i] + transitions[i][j],
+            )
+            scores.append(prev.scores[best_i] + transitions[best_i][j] + emission)
+            back.append(best_i)
+
+        decided = []
+        if max(scores) == -math.inf:
+            # No route connects the samples, so restart the chain here.
+            decided = self.flush()
+            scores, back = emissions, [-1] * len(emissions)
+        self._columns.append(_Column(timestamp, x, z, candidates, scores, back))
+        return decided + self._decide_full_window()
+
+    def flush(self) -> list[MatchedPoint]:
+        """
+        Decide all samples in the window, e.g. at the end of the stream.
+
+        Returns:
+            The decided samples, oldest first.
+        """
+        if not self._columns:
+            return []
+        path = self._best_path()
+        points = [
+            self._matched_point(column, i) for column, i in zip(self._columns, path)
+        ]
+        self._columns.clear()
+        return points
+
+    def _decide_full_window(self) -> list[MatchedPoint]:
+        if len(self._columns) <= self.window:
+            return []
+        i = self._best_path()[0]
+        column = self._columns.pop(0)
+        return [self._matched_point(column, i)]
+
+    def _best_path(self) -> list[int]:
+        # Candidate indices of the most likely path through the window.
+        last = self._columns[-1]
+        i = max(range(len(last.scores)), key=last.scores.__getitem__)
+        path = [i]
+        for column in reversed(self._columns[1:]):
+            i = column.back[i]
+            path.append(i)
+        path.reverse()
+        return path
+
+    @staticmethod
+    def _matched_point(column: _Column, i: int) -> MatchedPoint:
+        edge, offset, x, z, distance, _ = column.candidates[i]
+        return MatchedPoint(column.timestamp, edge, offset, x, z, distance)
@@ -0,0 +1,19 @@
+from dataclasses import dataclass
+
+
+@dataclass
+class MatchedPoint:
+    """
+    A position sample snapped onto the road graph.
+    """
+
+    timestamp: float  # s, of the sample
+    edge: int  # road graph edge index, or -1 if the sample could not be matched
+    offset: float  # m, from the tail node of the edge
+    x: float  # world x position on the edge (the sample position if unmatched)
+    z: float  # world z position on the edge (the sample position if unmatched)
+    distance: float  # m, from the sample to the matched position
+
+    @property
+    def matched(self) -> bool:
+        return self.edge >= 0
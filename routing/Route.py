@@ -0,0 +1,13 @@
+from dataclasses import dataclass
+
+
+@dataclass
+class Route:
+    """
+    A route through a road graph.
+    """
+
+    duration: float  # s
+    distance: float  # m
+    nodes: list[int]  # node indices from the source to the target
+    edges: list[int]  # edge indices from the source to the target
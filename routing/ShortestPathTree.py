@@ -0,0 +1,20 @@
+from array import array
+from dataclasses import dataclass
+
+
+@dataclass
+class ShortestPathTree:
+    """
+    The result of a single-source (or single-target) search over a road graph.
+    All arrays are indexed by node index.
+    """
+
+    root: int
+    durations: array  # f8, travel time from the root (inf if unreached)
+    distances: array  # f8, travel distance from the root (inf if unreached)
+    # s4, edge used to reach the node, or to leave it in a single-target tree
+    # (-1 for root/unreached)
+    parent_edges: array
+
+    def reached(self, node: int) -> bool:
+        return self.parent_edges[node] >= 0 or node == self.root
@@ -0,0 +1,207 @@
+import heapq
+import math
+from array import array
+
+from .MapMatchSession import MapMatchSession
+from .TsRoadGraph import TsEdgeEnum, TsRoadGraph
+
+# (edge, offset, x, z, distance, emission log probability)
+Candidate = tuple[int, float, float, float, float, float]
+
+
+class TsMapMatcher:
+    """
+    Matches streams of position samples onto the edges of a road graph
+    using a hidden Markov model (HMM), decoded with the Viterbi algorithm.
+    Each edge is treated as a straight segment between its nodes.
+    Candidate edges are found through a uniform grid over the edge segments.
+    Ferry edges are never matched, since vehicles don't drive along them.
+    A matcher holds no per-vehicle state, so it can be shared by many sessions.
+    """
+
+    def __init__(
+        self,
+        graph: TsRoadGraph,
+        cell_size: float = 100.0,
+        search_radius: float = 50.0,
+        max_candidates: int = 8,
+        position_sigma: float = 10.0,
+        transition_beta: float = 20.0,
+        heading_weight: float = 2.0,
+        max_speed: float = 50.0,
+    ):
+        """
+        Args:
+            graph: The road graph to match onto.
+            cell_size: Width of the spatial grid cells in m.
+            search_radius: Maximum distance from a sample to a candidate in m.
+            max_candidates: Maximum number of candidates kept per sample.
+            position_sigma: Standard deviation of the position error in m.
+            transition_beta: Scale of the difference between route and straight-line
+                distance between samples in m.
+            heading_weight: Weight of the heading mismatch
+                in the emission log probability.
+            max_speed: Maximum travel speed between samples in m/s.
+        """
+        self.graph = graph
+        self.cell_size = cell_size
+        self.search_radius = search_radius
+        self.max_candidates = max_candidates
+        self.position_sigma = position_sigma
+        self.transition_beta = transition_beta
+        self.heading_weight = heading_weight
+        self.max_speed = max_speed
+
+        # Map each grid cell to the edges whose segment bounding box overlaps it.
+        self._grid: dict[tuple[int, int], array] = {}
+        xs, zs = graph.node_xs, graph.node_zs
+        for e in range(graph.edge_count):
+            if graph.kinds[e] == TsEdgeEnum.FERRY.value:
+                continue
+            tail, head = graph.tails[e], graph.heads[e]
+            min_x, max_x = sorted((xs[tail], xs[head]))
+            min_z, max_z = sorted((zs[tail], zs[head]))
+            for cx in range(self._cell(min_x), self._cell(max_x) + 1):
+                for cz in range(self._cell(min_z), self._cell(max_z) + 1):
+                    self._grid.setdefault((cx, cz), array("I")).append(e)
+
+    def new_session(self, window: int = 10) -> MapMatchSession:
+        """
+        Start matching a new stream of samples (e.g. one vehicle).
+
+        Args:
+            window: Number of samples kept before the oldest one is decided.
+
+        Returns:
+            The session.
+        """
+        return MapMatchSession(self, window)
+
+    def _cell(self, v: float) -> int:
+        return math.floor(v / self.cell_size)
+
+    def candidates(
+        self, x: float, z: float, heading: float | None = None
+    ) -> list[Candidate]:
+        """
+        Get the most likely edges for a sample.
+
+        Args:
+            x: World x position of the sample.
+            z: World z position of the sample.
+            heading: Optional yaw of the vehicle (same convention as TsNode.yaw).
+
+        Returns:
+            Up to max_candidates candidates, most likely first.
+        """
+        r = self.search_radius
+        edge_set: set[int] = set()
+        for cx in range(self._cell(x - r), self._cell(x + r) + 1):
+            for cz in range(self._cell(z - r), self._cell(z + r) + 1):
+                cell = self._grid.get((cx, cz))
+                if cell:
+                    edge_set.update(cell)
+        if not edge_set:
+            return []
+
+        # Project the sample onto every nearby segment.
+        graph = self.graph
+        xs, zs = graph.node_xs, graph.node_zs
+        edges = list(edge_set)
+        ax = [xs[graph.tails[e]] for e in edges]
+        az = [zs[graph.tails[e]] for e in edges]
+        dx = [xs[graph.heads[e]] - a for e, a in zip(edges, ax)]
+        dz = [zs[graph.heads[e]] - a for e, a in zip(edges, az)]
+        seg_lengths = [math.hypot(u, v) or 1e-9 for u, v in zip(dx, dz)]
+        ts = [
+            min(1.0, max(0.0, ((x - a) * u + (z - b) * v) / (l * l)))
+            for a, b, u, v, l in zip(ax, az, dx, dz, seg_lengths)
+        ]
+        px = [a + t * u for a, t, u in zip(ax, ts, dx)]
+        pz = [b + t * v for b, t, v in zip(az, ts, dz)]
+        distances = [math.hypot(x - u, z - v) for u, v in zip(px, pz)]
+
+        inv_variance = 0.5 / (self.position_sigma * self.position_sigma)
+        emissions = [-d * d * inv_variance for d in distances]
+        if heading is not None:
+            fx, fz = -math.sin(heading), -math.cos(heading)
+            emissions = [
+                p + self.heading_weight * ((fx * u + fz * v) / l - 1)
+                for p, u, v, l in zip(emissions, dx, dz, seg_lengths)
+            ]
+
+        candidates = [
+            (e, t * graph.lengths[e], u, v, d, p)
+            for e, t, u, v, d, p in zip(edges, ts, px, pz, distances, emissions)
+            if d <= r
+        ]
+        candidates.sort(key=lambda c: c[5], reverse=True)
+        return candidates[: self.max_candidates]
+
+    def transition_scores(
+        self,
+        prev_candidates: list[Candidate],
+        candidates: list[Candidate],
+        straight_distance: float,
+        elapsed: float,
+    ) -> list[list[float]]:
+        """
+        Get the transition log probabilities between the candidates of two samples.
+        Route distances are found with one bounded search per previous candidate.
+
+        Args:
+            prev_candidates: Candidates of the previous sample.
+            candidates: Candidates of the current sample.
+            straight_distance: Straight-line distance between the samples in m.
+            elapsed: Time between the samples in s.
+
+        Returns:
+            scores[i][j] from previous candidate i to current candidate j,
+            or -inf if the transition is impossible.
+        """
+        graph = self.graph
+        limit = 2 * self.search_radius + (
+            self.max_speed * elapsed if elapsed > 0 else 2 * straight_distance
+        )
+
+        scores = []
+        for prev_edge, prev_offset, *_ in prev_candidates:
+            remaining = graph.lengths[prev_edge] - prev_offset
+            node_distances = self._node_distances(
+                graph.heads[prev_edge], limit - remaining
+            )
+            row = []
+            for edge, offset, *_ in candidates:
+                if edge == prev_edge and offset >= prev_offset:
+                    route_distance = offset - prev_offset
+                else:
+                    route_distance = (
+                        remaining
+                        + node_distances.get(graph.tails[edge], math.inf)
+                        + offset
+                    )
+                if route_distance > limit:
+                    row.append(-math.inf)
+                else:
+                    row.append(
+                        -abs(route_distance - straight_distance) / self.transition_beta
+                    )
+            scores.append(row)
+        return scores
+
+    def _node_distances(self, source: int, limit: float) -> dict[int, float]:
+        # Dijkstra by length, bounded by a maximum distance.
+        graph = self.graph
+        distances = {source: 0.0}
+        heap = [(0.0, source)]
+        while heap:
+            distance, u = heapq.heappop(heap)
+            if distance > distances.get(u, math.inf):
+                continue
+            for e in range(graph.offsets[u], graph.offsets[u + 1]):
+                v = graph.heads[e]
+                new_distance = distance + graph.lengths[e]
+                if new_distance <= limit and new_distance < distances.get(v, math.inf):
+                    distances[v] = new_distance
+                    heapq.heappush(heap, (new_distance, v))
+        return distances
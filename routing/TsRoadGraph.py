@@ -0,0 +1,661 @@
+import heapq
+import math
+import os
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from enum import Enum
+from typing import TYPE_CHECKING, Iterable, Self
+
+from sectors import TsItemIndex, TsSector
+from sectors.TsFerryItem import TsFerryItem
+from units import TsFerryConnection, TsPrefabDescriptor
+from .DistanceMatrix import DistanceMatrix
+from .FerryCostModel import FerryCostModel
+from .Route import Route
+from .ShortestPathTree import ShortestPathTree
+
+if TYPE_CHECKING:
+    from .TsTurnTable import TsTurnTable
+
+# Assumed average truck speed in m/s.
+# Used to estimate travel time until road look speed limits are parsed.
+_DEFAULT_ROAD_SPEED = 80 / 3.6
+
+# Graph used by worker processes of many_to_many().
+_worker_graph: "TsRoadGraph | None" = None
+
+
+class TsEdgeEnum(Enum):
+    ROAD = 0
+    PREFAB = 1  # navigation curves through a prefab
+    FERRY = 2  # ferry or train connection between ports
+
+
+class TsRoadGraph:
+    """
+    A directed road graph stored in compressed sparse row (CSR) form.
+    Nodes are referenced by index (0 to node_count - 1),
+    and edges are grouped by their tail node.
+    Each edge has a length (m), a travel time (s) and a kind (TsEdgeEnum),
+    and the travel time is used as the search cost.
+    """
+
+    def __init__(
+        self,
+        node_uids: Iterable[int],
+        node_xs: Iterable[float],
+        node_zs: Iterable[float],
+        edges: Iterable[tuple[int, int, float, float, TsEdgeEnum]],
+    ):
+        """
+        Args:
+            node_uids: The UID of each node.
+            node_xs: The world x position of each node.
+            node_zs: The world z position of each node.
+            edges: (tail index, head index, length, duration, kind) for each edge.
+        """
+        self.node_uids = array("Q", node_uids)
+        self.node_xs = array("d", node_xs)
+        self.node_zs = array("d", node_zs)
+        self._node_index: dict[int, int] = {
+            uid: i for i, uid in enumerate(self.node_uids)
+        }
+
+        # Sort edges by tail (counting sort) to build the CSR arrays.
+        edges = list(edges)
+        node_count = len(self.node_uids)
+        self.offsets = array("I", bytes(4 * (node_count + 1)))
+        for tail, *_ in edges:
+            self.offsets[tail + 1] += 1
+        for i in range(node_count):
+            self.offsets[i + 1] += self.offsets[i]
+
+        edge_count = len(edges)
+        self.tails = array("I", bytes(4 * edge_count))
+        self.heads = array("I", bytes(4 * edge_count))
+        self.lengths = array("d", bytes(8 * edge_count))
+        self.durations = array("d", bytes(8 * edge_count))
+        self.kinds = array("B", bytes(edge_count))
+        next_slot = self.offsets[:-1]
+        for tail, head, length, duration, kind in edges:
+            e = next_slot[tail]
+            next_slot[tail] += 1
+            self.tails[e] = tail
+            self.heads[e] = head
+            self.lengths[e] = length
+            self.durations[e] = duration
+            self.kinds[e] = kind.value
+
+        # Incoming edges of each node, grouped by head node.
+        self.in_offsets = array("I", bytes(4 * (node_count + 1)))
+        for head in self.heads:
+            self.in_offsets[head + 1] += 1
+        for i in range(node_count):
+            self.in_offsets[i + 1] += self.in_offsets[i]
+        self.in_edge_ids = array("I", bytes(4 * edge_count))
+        next_slot = self.in_offsets[:-1]
+        for e, head in enumerate(self.heads):
+            self.in_edge_ids[next_slot[head]] = e
+            next_slot[head] += 1
+
+    @classmethod
+    def from_sectors(
+        cls,
+        sectors: Iterable[TsSector],
+        ferry_connections: Iterable[TsFerryConnection] = (),
+        ferry_cost_model: FerryCostModel = FerryCostModel(),
+    ) -> Self:
+        """
+        Build a road graph from parsed sectors.
+        Roads are treated as bidirectional,
+        prefabs link their nodes along their navigation curves,
+        and ferry connections link the nodes of their ferry items,
+        which are linked to the nodes of their ports' prefabs.
+        A ferry item without a port prefab in the graph is linked
+        to the nearest road node instead.
+
+        Args:
+            sectors: The parsed sectors. They are iterated twice and not kept,
+                so they can be streamed from a TsSectorCatalog.
+            ferry_connections: The ferry connection definitions.
+            ferry_cost_model: Converts ferry connections into edge lengths and times.
+
+        Returns:
+            The road graph.
+        """
+        # Roads may reference nodes stored in a neighbouring sector,
+        # so collect all nodes first.
+        node_index: dict[int, int] = {}
+        node_uids: list[int] = []
+        node_xs: list[float] = []
+        node_zs: list[float] = []
+        for sector in sectors:
+            for node in sector.nodes.values():
+                if node.uid in node_index:
+                    continue
+                node_index[node.uid] = len(node_uids)
+                node_uids.append(node.uid)
+                node_xs.append(node.x)
+                node_zs.append(node.z)
+
+        edges: list[tuple[int, int, float, float, TsEdgeEnum]] = []
+        prefab_node_uids: dict[int, array] = {}
+        ferries: list[TsFerryItem] = []
+        for sector in sectors:
+            ferries += sector.ferries
+            for road in sector.roads:
+                node0 = node_index.get(road.node0_uid)
+                node1 = node_index.get(road.node1_uid)
+                if node0 is None or node1 is None:
+                    continue
+                duration = road.length / _DEFAULT_ROAD_SPEED
+                edges.append((node0, node1, road.length, duration, TsEdgeEnum.ROAD))
+                edges.append((node1, node0, road.length, duration, TsEdgeEnum.ROAD))
+
+            # Link prefab nodes which are connected by navigation curves.
+            for prefab in sector.prefabs:
+                prefab_node_uids[prefab.uid] = prefab.node_uids
+                descriptor = TsPrefabDescriptor.get(prefab.model_token)
+                node_count = len(prefab.node_uids)
+                if not descriptor or descriptor.node_count != node_count:
+                    continue
+                for start, end, length in descriptor.node_links:
+                    start_uid = prefab.node_uids[(start - prefab.origin) % node_count]
+                    end_uid = prefab.node_uids[(end - prefab.origin) % node_count]
+                    node0 = node_index.get(start_uid)
+                    node1 = node_index.get(end_uid)
+                    if node0 is None or node1 is None:
+                        continue
+                    duration = length / _DEFAULT_ROAD_SPEED
+                    edges.append((node0, node1, length, duration, TsEdgeEnum.PREFAB))
+
+        # The ferry item's own node is not part of any road,
+        # so link it to the nodes of the port prefab it belongs to.
+        # Ferry connections then run between the ferry nodes of their ports.
+        road_nodes = {edge[0] for edge in edges} | {edge[1] for edge in edges}
+        road_node_index: TsItemIndex | None = None
+        ferry_nodes: dict[int, int] = {}
+        for ferry in ferries:
+            ferry_node = node_index.get(ferry.node_uid)
+            if ferry_node is None:
+                continue
+            nodes = [
+                node_index[uid]
+                for uid in prefab_node_uids.get(ferry.prefab_uid, ())
+                if node_index.get(uid) in road_nodes
+            ]
+            x, z = node_xs[ferry_node], node_zs[ferry_node]
+            if not nodes and road_nodes:
+                if road_node_index is None:
+                    road_node_index = cls._point_index(road_nodes, node_xs, node_zs)
+                nearest = road_node_index.nearest(x, z)
+                if nearest is not None:
+                    nodes = [nearest[0]]
+            if not nodes:
+                continue
+
+            ferry_nodes[ferry.port_token] = ferry_node
+            for node in nodes:
+                length = math.hypot(node_xs[node] - x, node_zs[node] - z)
+                duration = length / _DEFAULT_ROAD_SPEED
+                edges.append((node, ferry_node, length, duration, TsEdgeEnum.PREFAB))
+                edges.append((ferry_node, node, length, duration, TsEdgeEnum.PREFAB))
+
+        # Each connection is defined once per direction.
+        for connection in ferry_connections:
+            node0 = ferry_nodes.get(connection.start_port_token)
+            node1 = ferry_nodes.get(connection.end_port_token)
+            if node0 is None or node1 is None:
+                continue
+            length = ferry_cost_model.length(connection)
+            duration = ferry_cost_model.duration(connection)
+            edges.append((node0, node1, length, duration, TsEdgeEnum.FERRY))
+
+        return cls(node_uids, node_xs, node_zs, edges)
+
+    @staticmethod
+    def _point_index(
+        nodes: Iterable[int], node_xs: list[float], node_zs: list[float]
+    ) -> TsItemIndex:
+        # Index nodes as zero-size items, with the node index as the UID.
+        nodes = list(nodes)
+        bounds = array("f")
+        for node in nodes:
+            bounds.extend((node_xs[node], node_zs[node], node_xs[node], node_zs[node]))
+        return TsItemIndex(array("B", bytes(len(nodes))), array("Q", nodes), bounds)
+
+    @property
+    def node_count(self) -> int:
+        return len(self.node_uids)
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.heads)
+
+    def node_index(self, node_uid: int) -> int:
+        """
+        Get the index of a node in the graph.
+
+        Args:
+            node_uid: The UID of the node.
+
+        Returns:
+            The node index.
+
+        Raises:
+            KeyError: The node is not in the graph.
+        """
+        index = self._node_index.get(node_uid)
+        if index is None:
+            raise KeyError(f"Node '{node_uid}' is not in the road graph.")
+        return index
+
+    def out_edges(self, node: int) -> range:
+        return range(self.offsets[node], self.offsets[node + 1])
+
+    def in_edges(self, node: int) -> array:
+        return self.in_edge_ids[self.in_offsets[node] : self.in_offsets[node + 1]]
+
+    def search(
+        self,
+        source: int,
+        targets: set[int] | None = None,
+        max_stretch: float | None = None,
+    ) -> ShortestPathTree:
+        """
+        Run Dijkstra's algorithm from a node, minimizing travel time.
+
+        Args:
+            source: The index of the source node.
+            targets: Optional node indices.
+                The search stops once all of them are settled.
+            max_stretch: Optional extra travel time, relative to the last target.
+                If given, the search continues after the last target is settled,
+                until every node within (1 + max_stretch) times its travel time
+                is settled.
+
+        Returns:
+            The shortest path tree rooted at the source.
+        """
+        node_count = self.node_count
+        offsets, heads = self.offsets, self.heads
+        lengths, edge_durations = self.lengths, self.durations
+
+        durations = array("d", [float("inf")]) * node_count
+        distances = array("d", [float("inf")]) * node_count
+        parent_edges = array("i", [-1]) * node_count
+        settled = bytearray(node_count)
+        remaining = len(targets) if targets else -1
+        max_duration = float("inf")
+
+        durations[source] = 0.0
+        distances[source] = 0.0
+        heap = [(0.0, source)]
+        while heap:
+            duration, u = heapq.heappop(heap)
+            if settled[u]:
+                continue
+            if duration > max_duration:
+                break
+            settled[u] = 1
+            if targets and u in targets:
+                remaining -= 1
+                if remaining == 0:
+                    if max_stretch is None:
+                        break
+                    max_duration = (1 + max_stretch) * duration
+
+            for e in range(offsets[u], offsets[u + 1]):
+                v = heads[e]
+                new_duration = duration + edge_durations[e]
+                if new_duration < durations[v]:
+                    durations[v] = new_duration
+                    distances[v] = distances[u] + lengths[e]
+                    parent_edges[v] = e
+                    heapq.heappush(heap, (new_duration, v))
+
+        return ShortestPathTree(source, durations, distances, parent_edges)
+
+    def search_backward(
+        self,
+        target: int,
+        sources: set[int] | None = None,
+        forward: ShortestPathTree | None = None,
+        max_duration: float = float("inf"),
+    ) -> ShortestPathTree:
+        """
+        Run Dijkstra's algorithm towards a node over the incoming edges,
+        minimizing travel time.
+
+        Args:
+            target: The index of the target node.
+            sources: Optional node indices.
+                The search stops once all of them are settled.
+            forward: Optional tree of a forward search.
+                Nodes are only reached if their duration in it plus their duration
+                to the target is at most max_duration.
+            max_duration: The limit used with forward, in s.
+
+        Returns:
+            The shortest path tree rooted at the target.
+            The parent edge of a node is the first edge of its path to the target.
+        """
+        node_count = self.node_count
+        in_offsets, in_edge_ids, tails = self.in_offsets, self.in_edge_ids, self.tails
+        lengths, edge_durations = self.lengths, self.durations
+
+        durations = array("d", [float("inf")]) * node_count
+        distances = array("d", [float("inf")]) * node_count
+        parent_edges = array("i", [-1]) * node_count
+        settled = bytearray(node_count)
+        remaining = len(sources) if sources else -1
+        bound = forward.durations if forward else None
+
+        durations[target] = 0.0
+        distances[target] = 0.0
+        heap = [(0.0, target)]
+        while heap:
+            duration, v = heapq.heappop(heap)
+            if settled[v]:
+                continue
+            settled[v] = 1
+            if sources and v in sources:
+                remaining -= 1
+                if remaining == 0:
+                    break
+
+            for i in range(in_offsets[v], in_offsets[v + 1]):
+                e = in_edge_ids[i]
+                u = tails[e]
+                new_duration = duration + edge_durations[e]
+                if new_duration < durations[u] and (
+                    bound is None or bound[u] + new_duration <= max_duration
+                ):
+                    durations[u] = new_duration
+                    distances[u] = distances[v] + lengths[e]
+                    parent_edges[u] = e
+                    heapq.heappush(heap, (new_duration, u))
+
+        return ShortestPathTree(target, durations, distances, parent_edges)
+
+    def alternatives(
+        self,
+        source: int,
+        target: int,
+        k: int = 3,
+        max_stretch: float = 0.25,
+        min_plateau: float = 0.2,
+        max_sharing: float = 0.7,
+    ) -> list[Route]:
+        """
+        Find the fastest route between two nodes and up to k - 1 alternatives,
+        with the plateau method.
+        One forward search runs from the source until every node within
+        the stretch limit is settled, then one backward search runs from the target,
+        limited to the nodes that could lie on an alternative by the forward tree.
+        A plateau is a chain of edges that lies in both search trees,
+        and each plateau gives the route source -> plateau -> target.
+
+        Args:
+            source: The index of the source node.
+            target: The index of the target node.
+            k: Maximum number of routes, including the fastest one.
+            max_stretch: Maximum extra travel time of an alternative,
+                relative to the fastest route.
+            min_plateau: Minimum travel time of an alternative's plateau,
+                relative to the fastest route.
+                Long plateaus avoid alternatives with pointless detours.
+            max_sharing: Maximum share of an alternative's travel time
+                on edges of the routes found before it.
+
+        Returns:
+            The fastest route followed by the alternatives, fastest first,
+            or an empty list if the target cannot be reached.
+            Alternatives may be missing if no plateau meets the limits.
+        """
+        forward = self.search(source, {target}, max_stretch)
+        if not forward.reached(target):
+            return []
+        best_duration = forward.durations[target]
+        max_duration = (1 + max_stretch) * best_duration
+        backward = self.search_backward(target, None, forward, max_duration)
+        heads, tails = self.heads, self.tails
+        fw_durations, bw_durations = forward.durations, backward.durations
+        fw_parents, bw_parents = forward.parent_edges, backward.parent_edges
+
+        best_nodes = self.path(forward, target)
+        best_edges = [fw_parents[node] for node in best_nodes[1:]]
+        best = Route(best_duration, forward.distances[target], best_nodes, best_edges)
+
+        # Find the plateaus: walk the backward tree from each node where one starts.
+        # An edge is on a plateau if it is the parent edge of its head in the
+        # forward tree and of its tail in the backward tree.
+        plateaus: list[tuple[float, float, int]] = []
+        inf = float("inf")
+        for u, fw_duration in enumerate(fw_durations):
+            if fw_duration == inf or fw_duration + bw_durations[u] > max_duration:
+                continue
+            e = bw_parents[u]
+            if e < 0 or fw_parents[heads[e]] != e:
+                continue
+            p = fw_parents[u]
+            if p >= 0 and bw_parents[tails[p]] == p:
+                continue  # u is inside a plateau
+
+            v = heads[e]
+            while True:
+                e = bw_parents[v]
+                if e < 0 or fw_parents[heads[e]] != e:
+                    break
+                v = heads[e]
+            plateau_duration = bw_durations[u] - bw_durations[v]
+            if plateau_duration >= min_plateau * best_duration:
+                duration = fw_duration + bw_durations[u]
+                plateaus.append((duration - plateau_duration, duration, u))
+
+        # Prefer long plateaus on fast routes, and skip routes that overlap too much.
+        # The fastest route is itself a plateau, so it is skipped.
+        plateaus.sort()
+        routes: list[Route] = []
+        used_edges = set(best_edges)
+        for _, duration, u in plateaus:
+            if len(routes) >= k - 1:
+                break
+            edges = []
+            e = fw_parents[u]
+            while e >= 0:
+                edges.append(e)
+                e = fw_parents[tails[e]]
+            edges.reverse()
+            e = bw_parents[u]
+            while e >= 0:
+                edges.append(e)
+                e = bw_parents[heads[e]]
+
+            nodes = [source] + [heads[e] for e in edges]
+            if len(set(nodes)) < len(nodes):
+                continue  # the route loops
+            shared = sum(self.durations[e] for e in edges if e in used_edges)
+            if shared > max_sharing * duration:
+                continue
+            distance = forward.distances[u] + backward.distances[u]
+            routes.append(Route(duration, distance, nodes, edges))
+            used_edges.update(edges)
+
+        routes.sort(key=lambda route: route.duration)
+        return [best] + routes
+
+    def search_edges(
+        self, source: int, target: int, turn_table: "TsTurnTable"
+    ) -> tuple[float, float, list[int]] | None:
+        """
+        Find the fastest route between two nodes, adding the penalty of every turn.
+        Runs Dijkstra's algorithm over edges instead of nodes,
+        so the cost of leaving a node can depend on the edge used to reach it.
+
+        Args:
+            source: The index of the source node.
+            target: The index of the target node.
+            turn_table: The turn penalties.
+
+        Returns:
+            The travel time, travel distance and node indices of the route,
+            or None if the target cannot be reached.
+        """
+        if source == target:
+            return 0.0, 0.0, [source]
+
+        edge_durations, lengths = self.durations, self.lengths
+        offsets, heads, tails = self.offsets, self.heads, self.tails
+        turn_penalties = turn_table.penalties
+        u_turn_penalty = turn_table.u_turn_penalty
+        durations = array("d", [float("inf")]) * self.edge_count
+        distances = array("d", [float("inf")]) * self.edge_count
+        parent_edges = array("i", [-1]) * self.edge_count
+        settled = bytearray(self.edge_count)
+
+        heap = []
+        for e in self.out_edges(source):
+            durations[e] = edge_durations[e]
+            distances[e] = lengths[e]
+            heap.append((edge_durations[e], e))
+        heapq.heapify(heap)
+
+        while heap:
+            duration, e = heapq.heappop(heap)
+            if settled[e]:
+                continue
+            settled[e] = 1
+
+            node = heads[e]
+            if node == target:
+                distance = distances[e]
+                nodes = [node]
+                while e >= 0:
+                    nodes.append(tails[e])
+                    e = parent_edges[e]
+                nodes.reverse()
+                return duration, distance, nodes
+
+            # Look up the turn penalty table of the node once for all its out edges.
+            first_out, last_out = offsets[node], offsets[node + 1]
+            table = turn_table.table(e)
+            for next_e in range(first_out, last_out):
+                if heads[next_e] == tails[e]:
+                    penalty = u_turn_penalty
+                elif table < 0:
+                    penalty = 0.0
+                else:
+                    penalty = turn_penalties[table + next_e - first_out]
+                new_duration = duration + penalty + edge_durations[next_e]
+                if new_duration < durations[next_e]:
+                    durations[next_e] = new_duration
+                    distances[next_e] = distances[e] + lengths[next_e]
+                    parent_edges[next_e] = e
+                    heapq.heappush(heap, (new_duration, next_e))
+        return None
+
+    def path(self, tree: ShortestPathTree, target: int) -> list[int] | None:
+        """
+        Get the node indices on the path from the root of a tree to a node.
+
+        Args:
+            tree: A shortest path tree from search().
+            target: The index of the last node on the path.
+
+        Returns:
+            The node indices from the root to the target, or None if unreached.
+        """
+        if not tree.reached(target):
+            return None
+
+        nodes = [target]
+        e = tree.parent_edges[target]
+        while e >= 0:
+            nodes.append(self.tails[e])
+            e = tree.parent_edges[self.tails[e]]
+        nodes.reverse()
+        return nodes
+
+    def many_to_many(
+        self,
+        source_uids: list[int],
+        target_uids: list[int],
+        workers: int | None = 1,
+        batch_size: int = 32,
+    ) -> DistanceMatrix:
+        """
+        Compute the travel distance and time between every source and target node.
+        Runs one search per source, which stops as soon as every target is settled.
+
+        Args:
+            source_uids: The UIDs of the source nodes (matrix rows).
+            target_uids: The UIDs of the target nodes (matrix columns).
+            workers: Number of processes to spread batches of sources over.
+                1 runs in this process, and None uses all cores.
+            batch_size: Number of sources sent to a worker at a time.
+
+        Returns:
+            The distance matrix.
+
+        Raises:
+            KeyError: A source or target node is not in the graph.
+        """
+        start_time = time.perf_counter()
+        sources = [self.node_index(uid) for uid in source_uids]
+        targets = [self.node_index(uid) for uid in target_uids]
+
+        if workers is None:
+            workers = os.cpu_count() or 1
+        if workers <= 1 or len(sources) <= batch_size:
+            rows = _search_batch(self, sources, targets)
+        else:
+            batches = [
+                sources[i : i + batch_size] for i in range(0, len(sources), batch_size)
+            ]
+            rows = []
+            with ProcessPoolExecutor(
+                max_workers=workers, initializer=_init_worker, initargs=(self,)
+            ) as executor:
+                for batch_rows in executor.map(
+                    _search_worker_batch, batches, [targets] * len(batches)
+                ):
+                    rows += batch_rows
+
+        distances = [distance_row for distance_row, _ in rows]
+        durations = [duration_row for _, duration_row in rows]
+        return DistanceMatrix(
+            list(source_uids),
+            list(target_uids),
+            distances,
+            durations,
+            time.perf_counter() - start_time,
+        )
+
+
+def _search_batch(
+    graph: TsRoadGraph, sources: list[int], targets: list[int]
+) -> list[tuple[array, array]]:
+    target_set = set(targets)
+    rows = []
+    for source in sources:
+        tree = graph.search(source, target_set)
+        rows.append(
+            (
+                array("d", (tree.distances[t] for t in targets)),
+                array("d", (tree.durations[t] for t in targets)),
+            )
+        )
+    return rows
+
+
+def _init_worker(graph: TsRoadGraph) -> None:
+    global _worker_graph
+    _worker_graph = graph
+
+
+def _search_worker_batch(
+    sources: list[int], targets: list[int]
+) -> list[tuple[array, array]]:
+    return _search_batch(_worker_graph, sources, targets)
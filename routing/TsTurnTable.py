@@ -0,0 +1,226 @@
+import math
+from array import array
+from typing import Iterable, Self
+
+from sectors import TsSector
+from utils import TsToken
+from .TsRoadGraph import TsRoadGraph
+
+
+class TsTurnTable:
+    """
+    Turn penalties (s) of a road graph, used by edge-based searches.
+    A turn is a pair of edges (in edge, out edge) that meet at a node.
+    Each node with penalties gets a dense in-degree x out-degree table,
+    stored in one flat array, so a penalty is looked up in constant time.
+    Turning back onto the reverse edge (a U-turn) has its own fixed penalty.
+    """
+
+    def __init__(
+        self,
+        graph: TsRoadGraph,
+        turn_penalties: dict[tuple[int, int], float],
+        u_turn_penalty: float = math.inf,
+    ):
+        """
+        Args:
+            graph: The road graph.
+            turn_penalties: Maps (in edge, out edge) to its penalty.
+                Turns that are not listed have no penalty.
+            u_turn_penalty: Penalty of turning back onto the reverse edge.
+        """
+        self.graph = graph
+        self.u_turn_penalty = u_turn_penalty
+
+        # Position of each edge among the incoming edges of its head node.
+        self._in_slots = array("I", bytes(4 * graph.edge_count))
+        in_degrees = array("I", bytes(4 * graph.node_count))
+        for e in range(graph.edge_count):
+            head = graph.heads[e]
+            self._in_slots[e] = in_degrees[head]
+            in_degrees[head] += 1
+
+        # Allocate a table for each node with penalties.
+        self._table_offsets = array("q", [-1]) * graph.node_count
+        self.penalties = array("d")
+        for in_edge, _ in turn_penalties:
+            node = graph.heads[in_edge]
+            if self._table_offsets[node] < 0:
+                self._table_offsets[node] = len(self.penalties)
+                out_degree = graph.offsets[node + 1] - graph.offsets[node]
+                self.penalties.extend(bytes(8 * in_degrees[node] * out_degree))
+
+        for (in_edge, out_edge), penalty in turn_penalties.items():
+            if graph.tails[out_edge] != graph.heads[in_edge]:
+                raise ValueError(f"Edges {in_edge} and {out_edge} do not form a turn.")
+            self.penalties[self._slot(in_edge, out_edge)] = penalty
+
+    @classmethod
+    def from_sectors(
+        cls,
+        graph: TsRoadGraph,
+        sectors: Iterable[TsSector],
+        rule_penalties: dict[str, float],
+        u_turn_penalty: float = math.inf,
+        snap_radius: float = 10.0,
+        cell_size: float = 100.0,
+    ) -> Self:
+        """
+        Compile the traffic rule and trajectory items of sectors into turn penalties.
+        A traffic rule applies to the road nodes inside the polygon formed by its
+        nodes, and a trajectory route rule applies to the road node nearest to its
+        trajectory node, since AI paths are not part of the road graph.
+        Turning from outside onto an edge that ends at a node with a rule
+        costs the rule's penalty (inf forbids it).
+
+        Args:
+            graph: The road graph built from the sectors.
+            sectors: The parsed sectors.
+            rule_penalties: Maps a rule name (e.g. 'no_trucks') to its penalty.
+                Rules that are not listed are ignored.
+            u_turn_penalty: Penalty of turning back onto the reverse edge.
+            snap_radius: Maximum distance from a trajectory node to its road node in m.
+            cell_size: Width of the grid cells used to find road nodes in m.
+
+        Returns:
+            The turn table.
+        """
+        xs, zs = graph.node_xs, graph.node_zs
+
+        # Map each grid cell to the road nodes (nodes with edges) in it.
+        grid: dict[tuple[int, int], list[int]] = {}
+        for node in range(graph.node_count):
+            if graph.offsets[node] == graph.offsets[node + 1] and not len(
+                graph.in_edges(node)
+            ):
+                continue
+            cell = (math.floor(xs[node] / cell_size), math.floor(zs[node] / cell_size))
+            grid.setdefault(cell, []).append(node)
+
+        def road_nodes_in(min_x: float, min_z: float, max_x: float, max_z: float):
+            for cx in range(
+                math.floor(min_x / cell_size), math.floor(max_x / cell_size) + 1
+            ):
+                for cz in range(
+                    math.floor(min_z / cell_size), math.floor(max_z / cell_size) + 1
+                ):
+                    for node in grid.get((cx, cz), ()):
+                        if min_x <= xs[node] <= max_x and min_z <= zs[node] <= max_z:
+                            yield node
+
+        def position(node_uid: int) -> tuple[float, float] | None:
+            try:
+                node = graph.node_index(node_uid)
+            except KeyError:
+                return None
+            return xs[node], zs[node]
+
+        # Highest penalty of the rules applied to each node.
+        node_penalties: dict[int, float] = {}
+
+        def apply(node: int, penalty: float) -> None:
+            node_penalties[node] = max(penalty, node_penalties.get(node, 0.0))
+
+        for sector in sectors:
+            for traffic_rule in sector.traffic_rules:
+                penalty = rule_penalties.get(TsToken.decode(traffic_rule.rule_token))
+                if penalty is None:
+                    continue
+                polygon = [position(uid) for uid in traffic_rule.node_uids]
+                polygon = [p for p in polygon if p is not None]
+                if len(polygon) < 3:
+                    continue
+                poly_xs, poly_zs = [x for x, _ in polygon], [z for _, z in polygon]
+                for node in road_nodes_in(
+                    min(poly_xs), min(poly_zs), max(poly_xs), max(poly_zs)
+                ):
+                    if _in_polygon(xs[node], zs[node], polygon):
+                        apply(node, penalty)
+
+            for trajectory in sector.trajectories:
+                for node_index, rule_token in trajectory.route_rules:
+                    penalty = rule_penalties.get(TsToken.decode(rule_token))
+                    if penalty is None or node_index >= len(trajectory.node_uids):
+                        continue
+                    p = position(trajectory.node_uids[node_index])
+                    if p is None:
+                        continue
+                    x, z = p
+                    nearest = min(
+                        road_nodes_in(
+                            x - snap_radius,
+                            z - snap_radius,
+                            x + snap_radius,
+                            z + snap_radius,
+                        ),
+                        key=lambda node: math.hypot(xs[node] - x, zs[node] - z),
+                        default=None,
+                    )
+                    if (
+                        nearest is not None
+                        and math.hypot(xs[nearest] - x, zs[nearest] - z) <= snap_radius
+                    ):
+                        apply(nearest, penalty)
+
+        turn_penalties: dict[tuple[int, int], float] = {}
+        for out_edge in range(graph.edge_count):
+            penalty = node_penalties.get(graph.heads[out_edge])
+            node = graph.tails[out_edge]
+            if penalty is None or node in node_penalties:
+                continue
+            for in_edge in graph.in_edges(node):
+                turn_penalties[(in_edge, out_edge)] = penalty
+        return cls(graph, turn_penalties, u_turn_penalty)
+
+    def table(self, in_edge: int) -> int:
+        """
+        Get where the penalties of the turns from an edge start in penalties.
+        The penalty of turning onto the k-th out edge of the node is at table + k.
+
+        Args:
+            in_edge: The edge arriving at the node.
+
+        Returns:
+            The start index, or -1 if no turns at the node have penalties.
+        """
+        graph = self.graph
+        node = graph.heads[in_edge]
+        table_offset = self._table_offsets[node]
+        if table_offset < 0:
+            return -1
+        out_degree = graph.offsets[node + 1] - graph.offsets[node]
+        return table_offset + self._in_slots[in_edge] * out_degree
+
+    def _slot(self, in_edge: int, out_edge: int) -> int:
+        node = self.graph.heads[in_edge]
+        return self.table(in_edge) + (out_edge - self.graph.offsets[node])
+
+    def penalty(self, in_edge: int, out_edge: int) -> float:
+        """
+        Get the penalty of a turn.
+
+        Args:
+            in_edge: The edge arriving at the node.
+            out_edge: The edge leaving the node.
+
+        Returns:
+            The penalty in s (inf if forbidden).
+        """
+        graph = self.graph
+        if graph.heads[out_edge] == graph.tails[in_edge]:
+            return self.u_turn_penalty
+        table = self.table(in_edge)
+        if table < 0:
+            return 0.0
+        return self.penalties[table + out_edge - graph.offsets[graph.heads[in_edge]]]
+
+
+def _in_polygon(x: float, z: float, polygon: list[tuple[float, float]]) -> bool:
+    # Even-odd rule: count the edges crossed by a ray towards +x.
+    inside = False
+    x0, z0 = polygon[-1]
+    for x1, z1 in polygon:
+        if (z1 > z) != (z0 > z) and x < x0 + (z - z0) * (x1 - x0) / (z1 - z0):
+            inside = not inside
+        x0, z0 = x1, z1
+    return inside
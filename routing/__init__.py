@@ -0,0 +1,8 @@
+from .DistanceMatrix import DistanceMatrix
+from .FerryCostModel import FerryCostModel
+from .TsRoadGraph import TsEdgeEnum, TsRoadGraph
+from .MatchedPoint import MatchedPoint
+from .Route import Route
+from .MapMatchSession import MapMatchSession
+from .TsMapMatcher import TsMapMatcher
+from .TsTurnTable import TsTurnTable
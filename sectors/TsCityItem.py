@@ -0,0 +1,21 @@
+from dataclasses import dataclass
+from struct import Struct
+
+from utils import StructDataClass
+
+
+@dataclass
+class TsCityItem(StructDataClass):
+    """
+    The area of a city.
+    The area spans (width, height) in x/z from the position of its node.
+    """
+
+    struct = Struct("<QffQ")
+
+    city_token: int  # u8 -> token
+    width: float  # f4
+    height: float  # f4
+    node_uid: int  # u8
+
+    uid: int = 0  # u8, from the item header
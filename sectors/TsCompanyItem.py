@@ -0,0 +1,39 @@
+import io
+from dataclasses import dataclass
+from typing import BinaryIO, Self
+
+
+@dataclass
+class TsCompanyItem:
+    """
+    A company depot, placed at a node of its prefab.
+    """
+
+    uid: int  # u8, from the item header
+    company_token: int  # u8 -> token
+    city_token: int  # u8 -> token
+    prefab_uid: int  # u8
+    node_uid: int  # u8
+
+    @classmethod
+    def parse(cls, f: BinaryIO, uid: int) -> Self:
+        """
+        Parse a company item body.
+        The cursor is left at the end of the body.
+
+        Args:
+            f: The binary stream, positioned after the item header.
+            uid: The item UID from the item header.
+
+        Returns:
+            The company item.
+        """
+        company_token = int.from_bytes(f.read(8), "little", signed=False)
+        city_token = int.from_bytes(f.read(8), "little", signed=False)
+        prefab_uid = int.from_bytes(f.read(8), "little", signed=False)
+        node_uid = int.from_bytes(f.read(8), "little", signed=False)
+        # spawn point, trailer spot, ... UID arrays
+        for _ in range(6):
+            count = int.from_bytes(f.read(4), "little", signed=True)
+            f.seek(0x08 * count, io.SEEK_CUR)
+        return cls(uid, company_token, city_token, prefab_uid, node_uid)
@@ -0,0 +1,18 @@
+from dataclasses import dataclass
+from struct import Struct
+
+from utils import StructDataClass
+
+
+@dataclass
+class TsFerryItem(StructDataClass):
+    struct = Struct("<QQQf4xf")
+
+    port_token: int  # u8 -> token
+    prefab_uid: int  # u8
+    node_uid: int  # u8
+    unload_x: float  # f4
+    # unload_y: float  # f4
+    unload_z: float  # f4
+
+    uid: int = 0  # u8, from the item header
@@ -0,0 +1,216 @@
+import heapq
+import math
+from array import array
+from typing import Iterable, Self
+
+from sectors.TsSector import TsItemEnum, TsSector
+
+
+class TsItemIndex:
+    """
+    A packed R-tree over the kdop bounds of map items, built with
+    Sort-Tile-Recursive (STR) packing.
+    Bounds are (min_x, min_z, max_x, max_z) in world units.
+    The tree is stored as flat arrays: level 0 holds the items in leaf order,
+    and each node of level k covers a run of node_capacity entries of level k - 1.
+    """
+
+    def __init__(
+        self,
+        item_types: array,
+        item_uids: array,
+        item_bounds: array,
+        node_capacity: int = 16,
+    ):
+        """
+        Args:
+            item_types: u1 item type of each item.
+            item_uids: u8 UID of each item.
+            item_bounds: f4 (min_x, min_z, max_x, max_z) of each item, flattened.
+            node_capacity: Maximum number of children per tree node.
+        """
+        self.node_capacity = node_capacity
+
+        # Sort items into tiles: slices by x center, then runs by z center.
+        item_count = len(item_uids)
+        centers_x = [
+            item_bounds[4 * i] + item_bounds[4 * i + 2] for i in range(item_count)
+        ]
+        centers_z = [
+            item_bounds[4 * i + 1] + item_bounds[4 * i + 3] for i in range(item_count)
+        ]
+        order = sorted(range(item_count), key=centers_x.__getitem__)
+        leaf_count = math.ceil(item_count / node_capacity)
+        slice_size = node_capacity * math.ceil(math.sqrt(leaf_count))
+        for start in range(0, item_count, slice_size or 1):
+            order[start : start + slice_size] = sorted(
+                order[start : start + slice_size], key=centers_z.__getitem__
+            )
+
+        self.item_types = array("B", (item_types[i] for i in order))
+        self.item_uids = array("Q", (item_uids[i] for i in order))
+        self._levels: list[array] = [array("f")]
+        for i in order:
+            self._levels[0].extend(item_bounds[4 * i : 4 * i + 4])
+
+        # Pack each level into parent nodes until a single root remains.
+        while len(self._levels[-1]) > 4:
+            children = self._levels[-1]
+            parents = array("f")
+            step = 4 * node_capacity
+            for start in range(0, len(children), step):
+                run = children[start : start + step]
+                parents.extend(
+                    (min(run[0::4]), min(run[1::4]), max(run[2::4]), max(run[3::4]))
+                )
+            self._levels.append(parents)
+
+    @classmethod
+    def from_sectors(cls, sectors: Iterable[TsSector], node_capacity: int = 16) -> Self:
+        """
+        Build an index of the items in sectors.
+        Sectors parsed with headers_only are sufficient.
+
+        Args:
+            sectors: The parsed sectors.
+            node_capacity: Maximum number of children per tree node.
+
+        Returns:
+            The item index.
+        """
+        item_types, item_uids, item_bounds = array("B"), array("Q"), array("f")
+        for sector in sectors:
+            item_types += sector.item_types
+            item_uids += sector.item_uids
+            item_bounds += sector.item_bounds
+        return cls(item_types, item_uids, item_bounds, node_capacity)
+
+    def __len__(self) -> int:
+        return len(self.item_uids)
+
+    def query(
+        self,
+        min_x: float,
+        min_z: float,
+        max_x: float,
+        max_z: float,
+        item_types: set[TsItemEnum] | None = None,
+    ) -> list[int]:
+        """
+        Get the items whose bounds intersect a rectangle.
+
+        Args:
+            min_x: Minimum world x position.
+            min_z: Minimum world z position.
+            max_x: Maximum world x position.
+            max_z: Maximum world z position.
+            item_types: Optional item types to filter by.
+
+        Returns:
+            The UIDs of the intersecting items.
+        """
+        if not self.item_uids:
+            return []
+
+        type_values = {t.value for t in item_types} if item_types else None
+        capacity = self.node_capacity
+        uids = []
+
+        # Stack of (level, node position in level).
+        stack = [(len(self._levels) - 1, 0)]
+        while stack:
+            level, i = stack.pop()
+            bounds = self._levels[level]
+            if (
+                bounds[4 * i] > max_x
+                or bounds[4 * i + 1] > max_z
+                or bounds[4 * i + 2] < min_x
+                or bounds[4 * i + 3] < min_z
+            ):
+                continue
+
+            if level == 0:
+                if type_values is None or self.item_types[i] in type_values:
+                    uids.append(self.item_uids[i])
+            else:
+                child_count = len(self._levels[level - 1]) // 4
+                for child in range(i * capacity, min((i + 1) * capacity, child_count)):
+                    stack.append((level - 1, child))
+        return uids
+
+    def nearest(
+        self,
+        x: float,
+        z: float,
+        item_types: set[TsItemEnum] | None = None,
+        max_distance: float = math.inf,
+    ) -> tuple[int, float] | None:
+        """
+        Get the item whose bounds are nearest to a position,
+        with a best-first search over the tree.
+
+        Args:
+            x: World x position.
+            z: World z position.
+            item_types: Optional item types to filter by.
+            max_distance: Maximum distance to the item bounds.
+
+        Returns:
+            (UID, distance) of the nearest item (distance 0 if the position
+            is inside its bounds), or None if no item is within max_distance.
+            Of several items at the same distance, the one with the lowest UID.
+        """
+        if not self.item_uids:
+            return None
+
+        type_values = {t.value for t in item_types} if item_types else None
+        capacity = self.node_capacity
+
+        # Heap of (distance to bounds, -level, item UID, node position in level).
+        # Tree nodes are expanded before items at the same distance,
+        # so the first item popped has the lowest UID of the nearest items.
+        top = len(self._levels) - 1
+        if (
+            top == 0
+            and type_values is not None
+            and self.item_types[0] not in type_values
+        ):
+            # The root is the only item.
+            return None
+        heap = [(self._distance(top, 0, x, z), -top, self.item_uids[0], 0)]
+        while heap:
+            distance, level, _, i = heapq.heappop(heap)
+            level = -level
+            if distance > max_distance:
+                return None
+            if level == 0:
+                # Nothing left in the heap can be nearer than this item.
+                return self.item_uids[i], distance
+
+            child_level = level - 1
+            child_count = len(self._levels[child_level]) // 4
+            for child in range(i * capacity, min((i + 1) * capacity, child_count)):
+                if (
+                    child_level == 0
+                    and type_values is not None
+                    and self.item_types[child] not in type_values
+                ):
+                    continue
+                uid = self.item_uids[child] if child_level == 0 else 0
+                heapq.heappush(
+                    heap,
+                    (
+                        self._distance(child_level, child, x, z),
+                        -child_level,
+                        uid,
+                        child,
+                    ),
+                )
+        return None
+
+    def _distance(self, level: int, i: int, x: float, z: float) -> float:
+        # Distance from a position to the bounds of a tree node (0 if inside).
+        bounds = self._levels[level]
+        dx = max(bounds[4 * i] - x, 0.0, x - bounds[4 * i + 2])
+        dz = max(bounds[4 * i + 1] - z, 0.0, z - bounds[4 * i + 3])
+        return math.hypot(dx, dz)
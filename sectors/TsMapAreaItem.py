@@ -0,0 +1,33 @@
+from array import array
+from dataclasses import dataclass
+from typing import BinaryIO, Self
+
+
+@dataclass
+class TsMapAreaItem:
+    """
+    A filled polygon drawn on the map (e.g. a parking lot),
+    with its outline formed by its nodes.
+    """
+
+    uid: int  # u8, from the item header
+    node_uids: array  # u8 array
+    color: int  # u4, map color index
+
+    @classmethod
+    def parse(cls, f: BinaryIO, uid: int) -> Self:
+        """
+        Parse a map area item body.
+        The cursor is left at the end of the body.
+
+        Args:
+            f: The binary stream, positioned after the item header.
+            uid: The item UID from the item header.
+
+        Returns:
+            The map area item.
+        """
+        node_count = int.from_bytes(f.read(4), "little", signed=True)
+        node_uids = array("Q", f.read(0x08 * node_count))
+        color = int.from_bytes(f.read(4), "little", signed=False)
+        return cls(uid, node_uids, color)
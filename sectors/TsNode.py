@@ -0,0 +1,41 @@
+import math
+from dataclasses import dataclass
+from struct import Struct
+
+from utils import StructDataClass
+
+
+@dataclass
+class TsNode(StructDataClass):
+    struct = Struct("<QiiiffffQQ")
+
+    uid: int  # u8
+    x: float  # s4, 256x world value
+    y: float  # s4, 256x world value
+    z: float  # s4, 256x world value
+    rotation_w: float  # f4, quaternion
+    rotation_x: float  # f4, quaternion
+    rotation_y: float  # f4, quaternion
+    rotation_z: float  # f4, quaternion
+    backward_item_uid: int  # u8
+    forward_item_uid: int  # u8
+
+    def __post_init__(self):
+        # Positions are stored as fixed-point integers.
+        self.x /= 256
+        self.y /= 256
+        self.z /= 256
+
+    @property
+    def yaw(self) -> float:
+        """
+        Rotation around the y (up) axis in radians.
+        A yaw of 0 faces -z, and the forward direction is (-sin(yaw), -cos(yaw)) in x/z.
+        """
+        return 2 * math.atan2(self.rotation_y, self.rotation_w)
+
+    @property
+    def forward(self) -> tuple[float, float]:
+        """Unit (x, z) vector of the direction the node faces."""
+        yaw = self.yaw
+        return -math.sin(yaw), -math.cos(yaw)
@@ -0,0 +1,44 @@
+import io
+from array import array
+from dataclasses import dataclass
+from typing import BinaryIO, Self
+
+
+@dataclass
+class TsPrefabItem:
+    """
+    A placed instance of a prefab (e.g. an intersection).
+    Item node i is the prefab descriptor node (i + origin) % node_count.
+    """
+
+    uid: int  # u8, from the item header
+    model_token: int  # u8 -> token
+    variant_token: int  # u8 -> token
+    node_uids: array  # u8 array
+    origin: int  # u2, index of the descriptor node placed at node_uids[0]
+
+    @classmethod
+    def parse(cls, f: BinaryIO, uid: int) -> Self:
+        """
+        Parse a prefab item body.
+        The cursor is left at the end of the body.
+
+        Args:
+            f: The binary stream, positioned after the item header.
+            uid: The item UID from the item header.
+
+        Returns:
+            The prefab item.
+        """
+        model_token = int.from_bytes(f.read(8), "little", signed=False)
+        variant_token = int.from_bytes(f.read(8), "little", signed=False)
+        additional_parts_count = int.from_bytes(f.read(4), "little", signed=True)
+        f.seek(0x08 * additional_parts_count, io.SEEK_CUR)
+        node_count = int.from_bytes(f.read(4), "little", signed=True)
+        node_uids = array("Q", f.read(0x08 * node_count))
+        connected_item_count = int.from_bytes(f.read(4), "little", signed=True)
+        f.seek((0x08 * connected_item_count) + 0x08, io.SEEK_CUR)
+        origin = int.from_bytes(f.read(2), "little", signed=False)
+        # node look data (0x0C each), semaphore profile
+        f.seek((0x0C * node_count) + 0x08, io.SEEK_CUR)
+        return cls(uid, model_token, variant_token, node_uids, origin)
@@ -43,3 +43,5 @@ class TsRoadItem(StructDataClass):
     node0_uid: int  # u8
     node1_uid: int  # u8
     length: float  # f4
+
+    uid: int = 0  # u8, from the item header
@@ -1,20 +1,26 @@
 import io
+import sys
+from array import array
 from dataclasses import dataclass
 from enum import Enum
 from struct import Struct
 from typing import BinaryIO
 
 from filesystem.TsFile import TsFile
+from sectors.TsCityItem import TsCityItem
+from sectors.TsCompanyItem import TsCompanyItem
+from sectors.TsFerryItem import TsFerryItem
+from sectors.TsMapAreaItem import TsMapAreaItem
+from sectors.TsNode import TsNode
+from sectors.TsPrefabItem import TsPrefabItem
 from sectors.TsRoadItem import TsRoadItem
-from utils import StructDataClass
+from sectors.TsTrafficRuleItem import TsTrafficRuleItem
+from sectors.TsTrajectoryItem import TsTrajectoryItem
+from utils import StructDataClass, TsMemory
 
-# u32 item_type
-# u64 uid
-# kdop array_float minimums (u4, len 5)
-# kdop array_float maximums (u4, len 5)
-# u32 flags
-# u8 view_dist
-_ITEM_HEADER_SIZE = 0x30 + 0x05
+# Version of the parsed output of TsSector.
+# Bump when it changes, to invalidate sectors in a TsSectorCache.
+PARSER_VERSION = 6
 
 
 class TsItemEnum(Enum):
@@ -65,22 +71,76 @@ class _SectorHeader(StructDataClass):
         assert self.game_map_version == 3
 
 
+@dataclass
+class _ItemHeader(StructDataClass):
+    struct = Struct("<IQfff8xfff8xIB")
+
+    item_type: int  # u4
+    uid: int  # u8
+    # kdop minimums: array_float (f4, len 5)
+    min_x: float  # f4
+    min_y: float  # f4
+    min_z: float  # f4
+    # min_3: float  # f4
+    # min_4: float  # f4
+    # kdop maximums: array_float (f4, len 5)
+    max_x: float  # f4
+    max_y: float  # f4
+    max_z: float  # f4
+    # max_3: float  # f4
+    # max_4: float  # f4
+    flags: int  # u4
+    view_dist: int  # u1
+
+    def __post_init__(self):
+        if self.item_type > 48:
+            raise ValueError(f"Unrecognized item type '{self.item_type}'")
+
+
 class TsSector:
-    def __init__(self, file: TsFile):
+    def __init__(self, file: TsFile, headers_only: bool = False):
+        """
+        Args:
+            file: The sector (.base) file.
+            headers_only: If true, only decode the item headers (type, UID and bounds).
+                Item bodies are skipped, and items and nodes are not parsed.
+        """
         f = io.BytesIO(file.read())
 
-        roads: list[TsRoadItem] = []
+        self.path = file.path
+        self.crc = file.crc
+        self.roads: list[TsRoadItem] = []
+        self.prefabs: list[TsPrefabItem] = []
+        self.traffic_rules: list[TsTrafficRuleItem] = []
+        self.trajectories: list[TsTrajectoryItem] = []
+        self.ferries: list[TsFerryItem] = []
+        self.cities: list[TsCityItem] = []
+        self.companies: list[TsCompanyItem] = []
+        self.map_areas: list[TsMapAreaItem] = []
+        self.nodes: dict[int, TsNode] = {}
+
+        # Item headers, stored compactly for building a TsItemIndex.
+        self.item_types = array("B")
+        self.item_uids = array("Q")
+        self.item_bounds = array("f")  # (min_x, min_z, max_x, max_z) per item
         try:
             header = _SectorHeader.parse(f)
 
             # Parse items.
             for _ in range(header.item_count):
-                item_type_int = int.from_bytes(f.read(4), "little", signed=False)
-                if item_type_int > 48:
-                    raise ValueError(f"Unrecognized item type '{item_type_int}'")
-                item_type = TsItemEnum(item_type_int)
+                item_header = _ItemHeader.parse(f)
+                item_type = TsItemEnum(item_header.item_type)
+                self.item_types.append(item_header.item_type)
+                self.item_uids.append(item_header.uid)
+                self.item_bounds.extend(
+                    (
+                        item_header.min_x,
+                        item_header.min_z,
+                        item_header.max_x,
+                        item_header.max_z,
+                    )
+                )
 
-                f.seek(_ITEM_HEADER_SIZE, io.SEEK_CUR)
                 # print(f"Parsing item type '{item_type}'...")
                 # print(f"Pos after item header: {hex(f.tell())}")
                 if item_type == TsItemEnum.TERRAIN:
@@ -97,8 +157,15 @@ class TsSector:
                     )
                     f.seek(0x04 * building_offset_count, io.SEEK_CUR)
                 elif item_type == TsItemEnum.ROAD:
-                    road = TsRoadItem.parse(f)
-                    roads.append(road)
+                    if headers_only:
+                        f.seek(TsRoadItem.struct.size, io.SEEK_CUR)
+                    else:
+                        road = TsRoadItem.parse(f)
+                        road.uid = item_header.uid
+                        self.roads.append(road)
+                elif item_type == TsItemEnum.PREFAB and not headers_only:
+                    prefab = TsPrefabItem.parse(f, item_header.uid)
+                    self.prefabs.append(prefab)
                 elif item_type == TsItemEnum.PREFAB:
                     f.seek(0x08 + 0x08, io.SEEK_CUR)
                     additional_parts_count = int.from_bytes(
@@ -116,6 +183,9 @@ class TsSector:
                     f.seek(0x18, io.SEEK_CUR)
                     add_parts_count = int.from_bytes(f.read(4), "little", signed=True)
                     f.seek((0x08 * add_parts_count) + 0x24, io.SEEK_CUR)
+                elif item_type == TsItemEnum.COMPANY and not headers_only:
+                    company = TsCompanyItem.parse(f, item_header.uid)
+                    self.companies.append(company)
                 elif item_type == TsItemEnum.COMPANY:
                     f.seek(0x08 + 0x08 + 0x08 + 0x08, io.SEEK_CUR)
                     count = int.from_bytes(f.read(4), "little", signed=True)
@@ -132,10 +202,18 @@ class TsSector:
                 elif item_type == TsItemEnum.CUT_PLANE:
                     node_count = int.from_bytes(f.read(4), "little", signed=False)
                     f.seek(0x08 * node_count, io.SEEK_CUR)
+                elif item_type == TsItemEnum.CITY and not headers_only:
+                    city = TsCityItem.parse(f)
+                    city.uid = item_header.uid
+                    self.cities.append(city)
                 elif item_type == TsItemEnum.CITY:
                     f.seek(0x08 + 0x04 + 0x04 + 0x08, io.SEEK_CUR)
                 elif item_type == TsItemEnum.MAP_OVERLAY:
                     f.seek(0x08 + 0x08, io.SEEK_CUR)
+                elif item_type == TsItemEnum.FERRY and not headers_only:
+                    ferry = TsFerryItem.parse(f)
+                    ferry.uid = item_header.uid
+                    self.ferries.append(ferry)
                 elif item_type == TsItemEnum.FERRY:
                     f.seek(0x08 + 0x08 + 0x08 + 0x0C, io.SEEK_CUR)
                 elif item_type == TsItemEnum.GARAGE:
@@ -214,6 +292,9 @@ class TsSector:
                 elif item_type == TsItemEnum.BUS_STOP:
                     # Note: mismatch from dariowouters ts-map
                     f.seek(0x08 + 0x08 + 0x08, io.SEEK_CUR)
+                elif item_type == TsItemEnum.TRAFFIC_RULE and not headers_only:
+                    traffic_rule = TsTrafficRuleItem.parse(f, item_header.uid)
+                    self.traffic_rules.append(traffic_rule)
                 elif item_type == TsItemEnum.TRAFFIC_RULE:
                     tag_count = int.from_bytes(f.read(4), "little", signed=True)
                     f.seek(0x08 * tag_count, io.SEEK_CUR)
@@ -224,6 +305,9 @@ class TsSector:
                     veg_sphere_count = int.from_bytes(f.read(4), "little", signed=True)
                     f.seek(0x14 * veg_sphere_count, io.SEEK_CUR)
                     self._parse_quad_info(f)
+                elif item_type == TsItemEnum.TRAJECTORY_ITEM and not headers_only:
+                    trajectory = TsTrajectoryItem.parse(f, item_header.uid)
+                    self.trajectories.append(trajectory)
                 elif item_type == TsItemEnum.TRAJECTORY_ITEM:
                     node_count = int.from_bytes(f.read(4), "little", signed=True)
                     f.seek((0x08 * node_count) + 0x08, io.SEEK_CUR)
@@ -233,6 +317,9 @@ class TsSector:
                     f.seek(0x10 * checkpoint_count, io.SEEK_CUR)
                     tag_count = int.from_bytes(f.read(4), "little", signed=True)
                     f.seek(0x08 * tag_count, io.SEEK_CUR)
+                elif item_type == TsItemEnum.MAP_AREA and not headers_only:
+                    map_area = TsMapAreaItem.parse(f, item_header.uid)
+                    self.map_areas.append(map_area)
                 elif item_type == TsItemEnum.MAP_AREA:
                     node_count = int.from_bytes(f.read(4), "little", signed=True)
                     f.seek((0x08 * node_count) + 0x04, io.SEEK_CUR)
@@ -271,11 +358,45 @@ class TsSector:
                     raise ValueError(f"Unknown item type {item_type}")
 
             # Parse nodes.
+            if headers_only:
+                return
             node_count = int.from_bytes(f.read(4), "little", signed=False)
-            print(node_count)
+            for node in TsNode.iter_parse(f, node_count):
+                self.nodes[node.uid] = node
         finally:
             f.close()
 
+    def memory_usage(self) -> dict[str, int]:
+        """
+        Estimate the memory held by the parsed items and nodes.
+        Items of each kind are sampled, so this is cheap enough to call per sector.
+
+        Returns:
+            The bytes held by each kind of parsed item.
+        """
+        usage = {
+            name: sys.getsizeof(items) + TsMemory.sampled_size(items, len(items))
+            for name, items in (
+                ("roads", self.roads),
+                ("prefabs", self.prefabs),
+                ("traffic_rules", self.traffic_rules),
+                ("trajectories", self.trajectories),
+                ("ferries", self.ferries),
+                ("cities", self.cities),
+                ("companies", self.companies),
+                ("map_areas", self.map_areas),
+            )
+        }
+        # The dict keys are the TsNode.uid objects, which are counted with the nodes.
+        usage["nodes"] = sys.getsizeof(self.nodes) + TsMemory.sampled_size(
+            self.nodes.values(), len(self.nodes)
+        )
+        usage["item_headers"] = sum(
+            sys.getsizeof(a)
+            for a in (self.item_types, self.item_uids, self.item_bounds)
+        )
+        return usage
+
     def _parse_quad_info(self, f: BinaryIO):
         material_count = int.from_bytes(f.read(2), "little", signed=False)
         f.seek(0x0A * material_count, io.SEEK_CUR)
@@ -0,0 +1,76 @@
+import os
+import pickle
+from pathlib import Path
+from struct import Struct
+
+from filesystem.TsFile import TsFile
+from sectors.TsSector import PARSER_VERSION, TsSector
+
+# Written before the pickle, so stale entries are skipped without unpickling them.
+_HEADER = Struct("<IIB")  # parser version u4, sector file CRC u4, headers_only u1
+
+
+class TsSectorCache:
+    """
+    A persistent cache of parsed sectors, stored as one pickle file per sector.
+    An entry is only used if the CRC of the sector file and the parser version
+    both match, so only changed sectors are parsed again.
+    Entries that can't be loaded (e.g. truncated, or pickled by an older parser
+    whose classes have moved) are parsed again and overwritten.
+    """
+
+    def __init__(self, cache_dir: Path):
+        """
+        Args:
+            cache_dir: The directory to store cached sectors in. Created if missing.
+        """
+        self.cache_dir = cache_dir
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def get_sector(self, file: TsFile, headers_only: bool = False) -> TsSector:
+        """
+        Get a parsed sector from the cache, or parse and cache it.
+        Files without a CRC are always parsed.
+
+        Args:
+            file: The sector (.base) file.
+            headers_only: See TsSector.
+
+        Returns:
+            The parsed sector.
+        """
+        if file.crc is None:
+            return TsSector(file, headers_only)
+
+        header = _HEADER.pack(PARSER_VERSION, file.crc, headers_only)
+        cache_path = self._cache_path(file, headers_only)
+        try:
+            with cache_path.open(mode="rb") as f:
+                if f.read(_HEADER.size) == header:
+                    return pickle.load(f)
+        except Exception:
+            pass
+
+        print(f"Parsing .base file: {file.path}...")
+        sector = TsSector(file, headers_only)
+        # Write to a temporary file first, so an interrupted write can't corrupt it.
+        temp_path = cache_path.with_name(f"{cache_path.name}.tmp")
+        with temp_path.open(mode="wb") as f:
+            f.write(header)
+            pickle.dump(sector, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, cache_path)
+        return sector
+
+    def invalidate(self, file: TsFile) -> None:
+        """
+        Remove the cached sectors of a file.
+
+        Args:
+            file: The sector (.base) file.
+        """
+        for headers_only in (False, True):
+            self._cache_path(file, headers_only).unlink(missing_ok=True)
+
+    def _cache_path(self, file: TsFile, headers_only: bool) -> Path:
+        suffix = ".headers.pickle" if headers_only else ".pickle"
+        return self.cache_dir / f"{file.hash:016x}{suffix}"
@@ -0,0 +1,252 @@
+import math
+import re
+from collections import OrderedDict
+from typing import Iterable, Iterator
+
+from filesystem import TsFileSystem
+from filesystem.TsFile import TsFile
+from sectors.TsSector import TsSector
+from sectors.TsSectorCache import TsSectorCache
+from utils import TsMemoryBudget
+
+# Width and height of a sector in world units.
+SECTOR_SIZE = 4000
+
+# e.g. sec+0017+0010.base, sec-0003+0012.base
+_SECTOR_NAME_PATTERN = re.compile(r"sec([+-]\d{4})([+-]\d{4})\.base$")
+
+
+class TsSectorCatalog:
+    """
+    An index of the sector files in a map directory, keyed by grid coordinates.
+    Sectors are parsed on demand, and parsed sectors are kept in an LRU cache
+    which evicts the least recently used sectors once it exceeds its memory cap.
+    With a sector_cache, evicted sectors are spilled to disk,
+    so loading them again only unpickles them.
+    """
+
+    def __init__(
+        self,
+        map_dir_path: str,
+        max_cache_bytes: int = 512 * 1024**2,
+        sector_cache: TsSectorCache | None = None,
+        memory_budget: TsMemoryBudget | None = None,
+    ):
+        """
+        Args:
+            map_dir_path: The absolute path of the map directory (e.g. /map/europe).
+            max_cache_bytes: Approximate memory cap of the parsed sector cache.
+            sector_cache: Optional persistent cache to load unchanged sectors from.
+            memory_budget: Optional budget shared with other components.
+                The catalog is registered in it, and the budget is updated
+                and enforced after each sector is loaded.
+
+        Raises:
+            FileNotFoundError: No sector files were found in the map directory.
+        """
+        self.max_cache_bytes = max_cache_bytes
+        self.sector_cache = sector_cache
+
+        self._files: dict[tuple[int, int], TsFile] = {}
+        for file in TsFileSystem.get_files(map_dir_path, ".base") or []:
+            coords = self.parse_coords(file.path)
+            if coords is not None:
+                self._files[coords] = file
+        if not self._files:
+            raise FileNotFoundError(
+                f"Could not find sector files in directory '{map_dir_path}'."
+            )
+
+        self._cache: OrderedDict[tuple[int, int], TsSector] = OrderedDict()
+        self._cache_usages: dict[tuple[int, int], dict[str, int]] = {}
+        self.cache_bytes = 0
+
+        self.memory_budget = memory_budget
+        self._budget_name = f"sectors {map_dir_path}"
+        if memory_budget:
+            memory_budget.register(self._budget_name, self)
+
+    @staticmethod
+    def parse_coords(file_path: str) -> tuple[int, int] | None:
+        """
+        Get the grid coordinates of a sector from its file name.
+
+        Args:
+            file_path: The sector file path (e.g. /map/europe/sec+0017+0010.base).
+
+        Returns:
+            The (x, z) grid coordinates, or None if the name is not a sector name.
+        """
+        match = _SECTOR_NAME_PATTERN.search(file_path)
+        if not match:
+            return None
+        return int(match.group(1)), int(match.group(2))
+
+    @property
+    def coords(self) -> list[tuple[int, int]]:
+        return list(self._files)
+
+    def coords_in_bbox(
+        self, min_x: float, min_z: float, max_x: float, max_z: float
+    ) -> list[tuple[int, int]]:
+        """
+        Get the coordinates of the sectors which intersect a world bounding box.
+
+        Args:
+            min_x: Minimum world x position.
+            min_z: Minimum world z position.
+            max_x: Maximum world x position.
+            max_z: Maximum world z position.
+
+        Returns:
+            The (x, z) grid coordinates of existing sectors.
+        """
+        coords = []
+        for x in range(int(min_x // SECTOR_SIZE), int(max_x // SECTOR_SIZE) + 1):
+            for z in range(int(min_z // SECTOR_SIZE), int(max_z // SECTOR_SIZE) + 1):
+                if (x, z) in self._files:
+                    coords.append((x, z))
+        return coords
+
+    def coords_in_corridor(
+        self, points: Iterable[tuple[float, float]], radius: float
+    ) -> list[tuple[int, int]]:
+        """
+        Get the coordinates of the sectors within a distance of a route polyline.
+        Segments are split into sector-sized pieces,
+        and each piece is covered by its bounding box grown by the radius.
+
+        Args:
+            points: The (x, z) world positions of the route.
+            radius: The corridor half-width in world units.
+
+        Returns:
+            The (x, z) grid coordinates of existing sectors, in route order.
+        """
+        points = list(points)
+        if len(points) == 1:
+            points *= 2
+
+        coords: dict[tuple[int, int], None] = {}
+        for (x0, z0), (x1, z1) in zip(points, points[1:]):
+            piece_count = max(1, math.ceil(math.dist((x0, z0), (x1, z1)) / SECTOR_SIZE))
+            for i in range(piece_count):
+                t0, t1 = i / piece_count, (i + 1) / piece_count
+                xa, za = x0 + (x1 - x0) * t0, z0 + (z1 - z0) * t0
+                xb, zb = x0 + (x1 - x0) * t1, z0 + (z1 - z0) * t1
+                for c in self.coords_in_bbox(
+                    min(xa, xb) - radius,
+                    min(za, zb) - radius,
+                    max(xa, xb) + radius,
+                    max(za, zb) + radius,
+                ):
+                    coords[c] = None
+        return list(coords)
+
+    def get_sector(self, coords: tuple[int, int]) -> TsSector:
+        """
+        Get a parsed sector, parsing it if it is not cached.
+
+        Args:
+            coords: The (x, z) grid coordinates of the sector.
+
+        Returns:
+            The parsed sector.
+
+        Raises:
+            KeyError: There is no sector at the coordinates.
+        """
+        sector = self._cache.get(coords)
+        if sector is not None:
+            self._cache.move_to_end(coords)
+            return sector
+
+        file = self._files.get(coords)
+        if file is None:
+            raise KeyError(f"Could not find sector at {coords}.")
+
+        if self.sector_cache:
+            sector = self.sector_cache.get_sector(file)
+        else:
+            print(f"Parsing .base file: {file.path}...")
+            sector = TsSector(file)
+        self._cache[coords] = sector
+        self._cache_usages[coords] = sector.memory_usage()
+        self.cache_bytes += sum(self._cache_usages[coords].values())
+
+        # Always keep the requested sector, even if it alone exceeds the cap.
+        while self.cache_bytes > self.max_cache_bytes and len(self._cache) > 1:
+            self.evict()
+        if self.memory_budget:
+            self.memory_budget.update(self._budget_name, self.cache_bytes)
+            self.memory_budget.enforce()
+        return sector
+
+    def get_sectors(self, coords: Iterable[tuple[int, int]]) -> list[TsSector]:
+        return [self.get_sector(c) for c in coords]
+
+    def stream_sectors(
+        self, coords: Iterable[tuple[int, int]] | None = None
+    ) -> Iterable[TsSector]:
+        """
+        Get sectors which are loaded one at a time whenever they are iterated.
+        Unlike get_sectors(), the sectors are not held by the result,
+        so passes over the whole map keep at most max_cache_bytes of them parsed.
+
+        Args:
+            coords: The (x, z) grid coordinates of the sectors. Defaults to all.
+
+        Returns:
+            The sectors, which can be iterated any number of times.
+        """
+        return _SectorStream(self, self.coords if coords is None else list(coords))
+
+    def get_sectors_in_bbox(
+        self, min_x: float, min_z: float, max_x: float, max_z: float
+    ) -> list[TsSector]:
+        return self.get_sectors(self.coords_in_bbox(min_x, min_z, max_x, max_z))
+
+    def get_sectors_in_corridor(
+        self, points: Iterable[tuple[float, float]], radius: float
+    ) -> list[TsSector]:
+        return self.get_sectors(self.coords_in_corridor(points, radius))
+
+    def evict(self) -> int | None:
+        """
+        Evict the least recently used sector from the cache.
+
+        Returns:
+            The bytes released, or None if the cache is empty.
+        """
+        if not self._cache:
+            return None
+        coords, _ = self._cache.popitem(last=False)
+        size = sum(self._cache_usages.pop(coords).values())
+        self.cache_bytes -= size
+        return size
+
+    def memory_usage(self) -> dict[str, int]:
+        """
+        Get the memory held by the cached sectors, as estimated when they were loaded.
+
+        Returns:
+            The bytes held by each kind of parsed item, summed over cached sectors.
+        """
+        usage: dict[str, int] = {}
+        for sector_usage in self._cache_usages.values():
+            for name, size in sector_usage.items():
+                usage[name] = usage.get(name, 0) + size
+        return usage
+
+
+class _SectorStream:
+    # Loads the sectors from the catalog again on every pass.
+    def __init__(self, catalog: TsSectorCatalog, coords: list[tuple[int, int]]):
+        self._catalog = catalog
+        self._coords = coords
+
+    def __len__(self) -> int:
+        return len(self._coords)
+
+    def __iter__(self) -> Iterator[TsSector]:
+        return (self._catalog.get_sector(c) for c in self._coords)
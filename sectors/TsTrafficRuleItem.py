@@ -0,0 +1,41 @@
+import io
+from array import array
+from dataclasses import dataclass
+from struct import Struct
+from typing import BinaryIO, Self
+
+# rule: u8 -> token, range: f4
+_RULE_STRUCT = Struct("<Qf")
+
+
+@dataclass
+class TsTrafficRuleItem:
+    """
+    A traffic area which applies a traffic rule (e.g. a vehicle restriction)
+    to the roads within the polygon formed by its nodes.
+    """
+
+    uid: int  # u8, from the item header
+    node_uids: array  # u8 array
+    rule_token: int  # u8 -> token
+    rule_range: float  # f4
+
+    @classmethod
+    def parse(cls, f: BinaryIO, uid: int) -> Self:
+        """
+        Parse a traffic rule item body.
+        The cursor is left at the end of the body.
+
+        Args:
+            f: The binary stream, positioned after the item header.
+            uid: The item UID from the item header.
+
+        Returns:
+            The traffic rule item.
+        """
+        tag_count = int.from_bytes(f.read(4), "little", signed=True)
+        f.seek(0x08 * tag_count, io.SEEK_CUR)
+        node_count = int.from_bytes(f.read(4), "little", signed=True)
+        node_uids = array("Q", f.read(0x08 * node_count))
+        rule_token, rule_range = _RULE_STRUCT.unpack(f.read(_RULE_STRUCT.size))
+        return cls(uid, node_uids, rule_token, rule_range)
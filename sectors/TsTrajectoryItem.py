@@ -0,0 +1,48 @@
+import io
+from array import array
+from dataclasses import dataclass
+from struct import Struct
+from typing import BinaryIO, Self
+
+# node_index: u4, rule: u8 -> token, params: f4[4]
+_ROUTE_RULE_STRUCT = Struct("<IQ16x")
+
+
+@dataclass
+class TsTrajectoryItem:
+    """
+    A scripted vehicle trajectory along its nodes,
+    with route rules applied at some of the nodes.
+    """
+
+    uid: int  # u8, from the item header
+    node_uids: array  # u8 array
+    flags: int  # u4
+    route_rules: list[tuple[int, int]]  # (node index, rule token)
+
+    @classmethod
+    def parse(cls, f: BinaryIO, uid: int) -> Self:
+        """
+        Parse a trajectory item body.
+        The cursor is left at the end of the body.
+
+        Args:
+            f: The binary stream, positioned after the item header.
+            uid: The item UID from the item header.
+
+        Returns:
+            The trajectory item.
+        """
+        node_count = int.from_bytes(f.read(4), "little", signed=True)
+        node_uids = array("Q", f.read(0x08 * node_count))
+        flags = int.from_bytes(f.read(4), "little", signed=False)
+        f.seek(0x04, io.SEEK_CUR)
+        route_rule_count = int.from_bytes(f.read(4), "little", signed=True)
+        route_rules = list(
+            _ROUTE_RULE_STRUCT.iter_unpack(f.read(0x1C * route_rule_count))
+        )
+        checkpoint_count = int.from_bytes(f.read(4), "little", signed=True)
+        f.seek(0x10 * checkpoint_count, io.SEEK_CUR)
+        tag_count = int.from_bytes(f.read(4), "little", signed=True)
+        f.seek(0x08 * tag_count, io.SEEK_CUR)
+        return cls(uid, node_uids, flags, route_rules)
@@ -1 +1,4 @@
 from .TsSector import TsSector
+from .TsSectorCache import TsSectorCache
+from .TsSectorCatalog import TsSectorCatalog
+from .TsItemIndex import TsItemIndex
@@ -0,0 +1,44 @@
+from routing import TsEdgeEnum, TsRoadGraph
+
+
+def _ring_graph() -> TsRoadGraph:
+    # Fastest route 0 -> 1 -> ... -> 10 (100 s),
+    # and a disjoint route 0 -> 11 -> ... -> 22 -> 10 (114 s),
+    # whose last nodes are further than 100 s from the source.
+    fastest = [(u, u + 1, 10.0) for u in range(10)]
+    alternative = list(zip([0, *range(11, 22)], range(11, 23), [110.0 / 12] * 12))
+    alternative.append((22, 10, 4.0))
+    edges = []
+    for u, v, duration in fastest + alternative:
+        edges.append((u, v, duration, duration, TsEdgeEnum.ROAD))
+        edges.append((v, u, duration, duration, TsEdgeEnum.ROAD))
+    return TsRoadGraph(range(23), [0.0] * 23, [0.0] * 23, edges)
+
+
+def test_alternative_from_other_side():
+    graph = _ring_graph()
+
+    routes = graph.alternatives(0, 10, max_stretch=0.25)
+
+    assert [route.nodes for route in routes] == [
+        list(range(11)),
+        [0, *range(11, 23), 10],
+    ]
+    assert routes[0].duration == 100.0
+    assert abs(routes[1].duration - 114.0) < 1e-9
+
+
+def test_alternative_outside_stretch():
+    graph = _ring_graph()
+
+    routes = graph.alternatives(0, 10, max_stretch=0.1)
+
+    assert [route.nodes for route in routes] == [list(range(11))]
+
+
+def test_search_max_stretch_settles_stretch_region():
+    graph = _ring_graph()
+
+    tree = graph.search(0, {10}, max_stretch=0.25)
+
+    assert tree.durations[22] == 104.0
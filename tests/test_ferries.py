@@ -0,0 +1,111 @@
+from array import array
+from types import SimpleNamespace
+
+from routing import FerryCostModel, TsEdgeEnum, TsRoadGraph
+from sectors.TsFerryItem import TsFerryItem
+
+
+def _node(uid: int, x: float, z: float) -> SimpleNamespace:
+    return SimpleNamespace(uid=uid, x=x, z=z)
+
+
+def _road(node0_uid: int, node1_uid: int, length: float) -> SimpleNamespace:
+    return SimpleNamespace(node0_uid=node0_uid, node1_uid=node1_uid, length=length)
+
+
+def _port(uid: int, node_uids: list[int]) -> SimpleNamespace:
+    return SimpleNamespace(
+        uid=uid,
+        model_token=0,
+        variant_token=0,
+        node_uids=array("Q", node_uids),
+        origin=0,
+    )
+
+
+def _sectors(port_prefabs: bool) -> list[SimpleNamespace]:
+    # Two islands, each with a road 1 -> 2 and 3 -> 4 ending at its port prefab,
+    # and a ferry item whose own node (5 and 6) is not on any road.
+    # The first port prefab also has the other end of its road as an exit.
+    nodes = [
+        _node(1, 0.0, 0.0),
+        _node(2, 100.0, 0.0),
+        _node(3, 10100.0, 0.0),
+        _node(4, 10200.0, 0.0),
+        _node(5, 120.0, 10.0),
+        _node(6, 10080.0, 10.0),
+    ]
+    return [
+        SimpleNamespace(
+            nodes={node.uid: node for node in nodes},
+            roads=[_road(1, 2, 100.0), _road(3, 4, 100.0)],
+            prefabs=[_port(10, [2, 1]), _port(11, [3])] if port_prefabs else [],
+            ferries=[
+                TsFerryItem(
+                    port_token=20, prefab_uid=10, node_uid=5, unload_x=0.0, unload_z=0.0
+                ),
+                TsFerryItem(
+                    port_token=21, prefab_uid=11, node_uid=6, unload_x=0.0, unload_z=0.0
+                ),
+            ],
+        )
+    ]
+
+
+def _connection() -> SimpleNamespace:
+    return SimpleNamespace(
+        start_port_token=20, end_port_token=21, time=30.0, distance=10.0, price=0.0
+    )
+
+
+def _route_kinds(graph: TsRoadGraph) -> list[TsEdgeEnum]:
+    source, target = graph.node_index(1), graph.node_index(4)
+    nodes = graph.path(graph.search(source, {target}), target)
+    assert nodes is not None
+    kinds = []
+    for u, v in zip(nodes, nodes[1:]):
+        edge = next(e for e in graph.out_edges(u) if graph.heads[e] == v)
+        kinds.append(TsEdgeEnum(graph.kinds[edge]))
+    return kinds
+
+
+def test_route_crosses_ferry_at_port_prefab():
+    graph = TsRoadGraph.from_sectors(_sectors(port_prefabs=True), [_connection()])
+
+    assert _route_kinds(graph) == [
+        TsEdgeEnum.PREFAB,
+        TsEdgeEnum.FERRY,
+        TsEdgeEnum.PREFAB,
+        TsEdgeEnum.ROAD,
+    ]
+
+
+def test_ferry_connection_links_ferry_nodes():
+    graph = TsRoadGraph.from_sectors(_sectors(port_prefabs=True), [_connection()])
+
+    ferry_edges = [
+        e for e in range(graph.edge_count) if graph.kinds[e] == TsEdgeEnum.FERRY.value
+    ]
+    assert [(graph.tails[e], graph.heads[e]) for e in ferry_edges] == [
+        (graph.node_index(5), graph.node_index(6))
+    ]
+    # Each port node is linked to its ferry node in both directions.
+    ferry_node = graph.node_index(5)
+    assert sorted(graph.heads[e] for e in graph.out_edges(ferry_node)) == sorted(
+        [graph.node_index(1), graph.node_index(2), graph.node_index(6)]
+    )
+
+
+def test_ferry_without_port_prefab_snaps_to_road():
+    graph = TsRoadGraph.from_sectors(
+        _sectors(port_prefabs=False), [_connection()], FerryCostModel()
+    )
+
+    # Each ferry node is linked to the nearest road node, 2 and 3.
+    assert _route_kinds(graph) == [
+        TsEdgeEnum.ROAD,
+        TsEdgeEnum.PREFAB,
+        TsEdgeEnum.FERRY,
+        TsEdgeEnum.PREFAB,
+        TsEdgeEnum.ROAD,
+    ]
@@ -0,0 +1,44 @@
+import random
+from types import SimpleNamespace
+
+from geocoding import TsGeocoder
+from sectors.TsCityItem import TsCityItem
+from sectors.TsCompanyItem import TsCompanyItem
+
+
+def _geocoder(spread: float = 1e5, size: float = 2000.0) -> TsGeocoder:
+    rng = random.Random(1)
+    nodes, cities, companies = {}, [], []
+    for i in range(100):
+        nodes[i] = SimpleNamespace(
+            x=rng.uniform(-spread, spread), z=rng.uniform(-spread, spread)
+        )
+        width, height = rng.uniform(100, size), rng.uniform(100, size)
+        cities.append(TsCityItem(1000 + i, width, height, i, 5000 + i))
+    for i in range(100, 600):
+        nodes[i] = SimpleNamespace(x=rng.uniform(-1e5, 1e5), z=rng.uniform(-1e5, 1e5))
+        companies.append(TsCompanyItem(9000 + i, 7, 1000, 0, i))
+    sector = SimpleNamespace(cities=cities, companies=companies, nodes=nodes)
+    return TsGeocoder([sector])
+
+
+def test_lookup_many_matches_lookup():
+    geocoder = _geocoder()
+    rng = random.Random(2)
+    positions = [(rng.uniform(-5e3, 5e3), rng.uniform(-5e3, 5e3)) for _ in range(500)]
+
+    assert geocoder.lookup_many(positions) == [
+        geocoder.lookup(x, z) for x, z in positions
+    ]
+
+
+def test_lookup_many_matches_lookup_in_overlapping_areas():
+    # Most positions are inside several city areas, at distance 0 from each.
+    geocoder = _geocoder(spread=5e3, size=1e4)
+    rng = random.Random(3)
+    positions = [(rng.uniform(-5e3, 5e3), rng.uniform(-5e3, 5e3)) for _ in range(500)]
+
+    results = geocoder.lookup_many(positions)
+
+    assert sum(result.city_distance == 0.0 for result in results) > 400
+    assert results == [geocoder.lookup(x, z) for x, z in positions]
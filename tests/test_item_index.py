@@ -0,0 +1,47 @@
+from array import array
+
+from sectors import TsItemIndex
+from sectors.TsSector import TsItemEnum
+
+
+def _index(types: list[TsItemEnum], bounds: list[float]) -> TsItemIndex:
+    return TsItemIndex(
+        array("B", [t.value for t in types]),
+        array("Q", range(1, len(types) + 1)),
+        array("f", bounds),
+        node_capacity=4,
+    )
+
+
+def test_nearest_filters_single_item():
+    index = _index([TsItemEnum.ROAD], [0.0, 0.0, 10.0, 10.0])
+
+    assert index.nearest(5.0, 5.0) == (1, 0.0)
+    assert index.nearest(5.0, 5.0, {TsItemEnum.ROAD}) == (1, 0.0)
+    assert index.nearest(5.0, 5.0, {TsItemEnum.CITY}) is None
+
+
+def test_nearest_filters_items():
+    types = [TsItemEnum.ROAD] * 9 + [TsItemEnum.CITY]
+    bounds = []
+    for i in range(10):
+        bounds += [10.0 * i, 0.0, 10.0 * i + 5.0, 5.0]
+    index = _index(types, bounds)
+
+    assert index.nearest(0.0, 0.0) == (1, 0.0)
+    assert index.nearest(0.0, 0.0, {TsItemEnum.CITY}) == (10, 90.0)
+
+
+def test_nearest_breaks_ties_by_uid():
+    # 40 overlapping items containing the position, in different tree nodes.
+    bounds = []
+    for i in range(40):
+        bounds += [-1.0 - i, -1.0, 1.0 + i, 1.0]
+    index = TsItemIndex(
+        array("B", [TsItemEnum.CITY.value] * 40),
+        array("Q", range(140, 100, -1)),
+        array("f", bounds),
+        node_capacity=4,
+    )
+
+    assert index.nearest(0.0, 0.0) == (101, 0.0)
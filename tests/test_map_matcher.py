@@ -0,0 +1,119 @@
+import math
+import random
+
+from routing import TsEdgeEnum, TsMapMatcher, TsRoadGraph
+
+
+def _graph() -> TsRoadGraph:
+    # A road east from 0 to 3, with a branch north at node 2 (0 -> 1 -> 2 -> 4 -> 5),
+    # and an overpass 6 -> 7 crossing the branch at z = 40 without a junction.
+    positions = [
+        (0.0, 0.0),
+        (100.0, 0.0),
+        (200.0, 0.0),
+        (300.0, 0.0),
+        (200.0, 100.0),
+        (200.0, 200.0),
+        (100.0, 40.0),
+        (300.0, 40.0),
+    ]
+    edges = []
+    for u, v in [(0, 1), (1, 2), (2, 3), (2, 4), (4, 5), (6, 7)]:
+        length = math.dist(positions[u], positions[v])
+        edges.append((u, v, length, length, TsEdgeEnum.ROAD))
+        edges.append((v, u, length, length, TsEdgeEnum.ROAD))
+    return TsRoadGraph(
+        range(len(positions)),
+        [x for x, _ in positions],
+        [z for _, z in positions],
+        edges,
+    )
+
+
+def _trace(noise: float) -> list[tuple[float, float, float]]:
+    # Samples every 20 m along 0 -> 1 -> 2 -> 4 -> 5 at 10 m/s.
+    rng = random.Random(1)
+    points = [(float(x), 0.0) for x in range(10, 200, 20)]
+    points += [(200.0, float(z)) for z in range(10, 200, 20)]
+    return [
+        (x + rng.uniform(-noise, noise), z + rng.uniform(-noise, noise), 2.0 * i)
+        for i, (x, z) in enumerate(points)
+    ]
+
+
+def _match(graph: TsRoadGraph, window: int, noise: float = 8.0):
+    session = TsMapMatcher(graph).new_session(window)
+    points = []
+    for x, z, timestamp in _trace(noise):
+        points += session.push(x, z, None, timestamp)
+    return points + session.flush()
+
+
+def _node_pairs(graph: TsRoadGraph, points) -> list[tuple[int, int]]:
+    pairs = []
+    for point in points:
+        pair = (graph.tails[point.edge], graph.heads[point.edge])
+        if not pairs or pairs[-1] != pair:
+            pairs.append(pair)
+    return pairs
+
+
+def test_noisy_trace_past_overpass():
+    graph = _graph()
+
+    points = _match(graph, window=4)
+
+    assert len(points) == 20
+    assert all(point.matched for point in points)
+    assert [point.timestamp for point in points] == [2.0 * i for i in range(20)]
+    assert _node_pairs(graph, points) == [(0, 1), (1, 2), (2, 4), (4, 5)]
+
+
+def test_window_boundaries_match_whole_trace():
+    graph = _graph()
+
+    # A window of 1 decides each sample one step after it arrives,
+    # and a window longer than the trace decides everything at the end.
+    short = _match(graph, window=1)
+    whole = _match(graph, window=100)
+
+    assert [p.edge for p in short] == [p.edge for p in whole]
+    assert _node_pairs(graph, short) == [(0, 1), (1, 2), (2, 4), (4, 5)]
+
+
+def test_candidates_are_pruned_and_ranked():
+    graph = _graph()
+    matcher = TsMapMatcher(graph, max_candidates=2)
+
+    candidates = matcher.candidates(150.0, 5.0)
+
+    assert len(candidates) == 2
+    # Both directions of the nearest road, 5 m away.
+    assert {(graph.tails[c[0]], graph.heads[c[0]]) for c in candidates} == {
+        (1, 2),
+        (2, 1),
+    }
+    assert all(abs(c[4] - 5.0) < 1e-9 for c in candidates)
+
+
+def test_heading_selects_direction():
+    graph = _graph()
+    matcher = TsMapMatcher(graph)
+
+    # Facing +x (yaw -pi/2, since forward is (-sin, -cos)).
+    edge = matcher.candidates(150.0, 5.0, heading=-math.pi / 2)[0][0]
+
+    assert (graph.tails[edge], graph.heads[edge]) == (1, 2)
+
+
+def test_off_road_sample_ends_chain():
+    graph = _graph()
+    session = TsMapMatcher(graph).new_session(window=10)
+
+    session.push(50.0, 2.0, None, 0.0)
+    session.push(70.0, 2.0, None, 2.0)
+    points = session.push(50.0, 500.0, None, 4.0)
+
+    assert [point.matched for point in points] == [True, True, False]
+    assert points[2].edge == -1
+    assert session.flush() == []
@@ -0,0 +1,48 @@
+from utils import TsMemoryBudget
+
+
+class _Component:
+    def __init__(self, sizes: list[int]):
+        self.sizes = sizes
+        self.measure_count = 0
+
+    def memory_usage(self) -> dict[str, int]:
+        self.measure_count += 1
+        return {"entries": sum(self.sizes)}
+
+    def evict(self) -> int | None:
+        return self.sizes.pop(0) if self.sizes else None
+
+
+def test_evicts_largest_component_first():
+    small, large = _Component([10, 10]), _Component([40, 40, 40])
+    budget = TsMemoryBudget(max_bytes=70)
+    budget.register("small", small)
+    budget.register("large", large)
+
+    assert budget.enforce() == 2
+    assert small.sizes == [10, 10]
+    assert large.sizes == [40]
+    assert budget.total_bytes() == 60
+
+
+def test_under_limit_does_not_measure():
+    component = _Component([10])
+    budget = TsMemoryBudget(max_bytes=100)
+    budget.register("component", component)
+    measure_count = component.measure_count
+
+    for _ in range(10):
+        component.sizes.append(1)
+        budget.update("component", sum(component.sizes))
+        assert budget.enforce() == 0
+    assert component.measure_count == measure_count
+
+
+def test_not_evictable():
+    component = _Component([40, 40])
+    budget = TsMemoryBudget(max_bytes=10)
+    budget.register("component", component, evictable=False)
+
+    assert budget.enforce() == 0
+    assert component.sizes == [40, 40]
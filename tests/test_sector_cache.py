@@ -0,0 +1,107 @@
+import importlib
+import pickle
+from struct import Struct
+
+import pytest
+
+from filesystem.TsFile import TsFile
+from sectors import TsSectorCache
+from sectors.TsNode import TsNode
+
+# sectors.TsSectorCache is shadowed by the class re-exported from sectors.
+cache_module = importlib.import_module("sectors.TsSectorCache")
+
+
+def _sector_data(node_count: int) -> bytes:
+    # A sector without items, followed by its nodes.
+    data = Struct("<I8sII").pack(898, b"euro2", 3, 0)
+    data += node_count.to_bytes(4, "little")
+    for uid in range(1, node_count + 1):
+        data += TsNode.struct.pack(uid, 256 * uid, 0, 0, 1.0, 0.0, 0.0, 0.0, 0, 0)
+    return data
+
+
+class _SectorFile(TsFile):
+    def __init__(self, crc: int, node_count: int = 2):
+        super().__init__(0x1234, self._read_data, crc)
+        self.path = "/map/europe/sec+0000+0000.base"
+        self.data = _sector_data(node_count)
+        self.read_count = 0
+
+    def _read_data(self) -> bytes:
+        self.read_count += 1
+        return self.data
+
+
+@pytest.fixture
+def cache(tmp_path) -> TsSectorCache:
+    return TsSectorCache(tmp_path)
+
+
+def test_hit(cache):
+    cache.get_sector(_SectorFile(crc=1))
+    file = _SectorFile(crc=1)
+
+    sector = cache.get_sector(file)
+
+    assert file.read_count == 0
+    assert sorted(sector.nodes) == [1, 2]
+    assert sector.nodes[2].x == 2.0
+
+
+def test_miss_on_crc_change(cache):
+    cache.get_sector(_SectorFile(crc=1))
+    file = _SectorFile(crc=2, node_count=3)
+
+    sector = cache.get_sector(file)
+
+    assert file.read_count == 1
+    assert sorted(sector.nodes) == [1, 2, 3]
+    # The new entry replaces the old one.
+    file = _SectorFile(crc=2)
+    assert len(cache.get_sector(file).nodes) == 3
+    assert file.read_count == 0
+
+
+def test_miss_on_parser_version_bump(cache, monkeypatch):
+    cache.get_sector(_SectorFile(crc=1))
+    monkeypatch.setattr(cache_module, "PARSER_VERSION", cache_module.PARSER_VERSION + 1)
+    file = _SectorFile(crc=1)
+
+    cache.get_sector(file)
+
+    assert file.read_count == 1
+
+
+@pytest.mark.parametrize(
+    "corrupt",
+    [
+        lambda data: data[: len(data) // 2],  # truncated
+        lambda data: b"",  # empty
+        lambda data: data[:9] + b"garbage",  # not a pickle
+        # Pickled by an older parser, with a class that no longer exists.
+        lambda data: data[:9] + b"cmoved_module\nTsSector\n.",
+    ],
+)
+def test_corrupt_or_stale_file_is_a_miss(cache, corrupt):
+    cache.get_sector(_SectorFile(crc=1))
+    cache_path = next(cache.cache_dir.iterdir())
+    cache_path.write_bytes(corrupt(cache_path.read_bytes()))
+    file = _SectorFile(crc=1)
+
+    sector = cache.get_sector(file)
+
+    assert file.read_count == 1
+    assert sorted(sector.nodes) == [1, 2]
+    assert [path.name for path in cache.cache_dir.iterdir()] == [cache_path.name]
+
+
+def test_old_format_is_a_miss(cache):
+    cache.get_sector(_SectorFile(crc=1))
+    cache_path = next(cache.cache_dir.iterdir())
+    cache_path.write_bytes(pickle.dumps(((1, 6, False), None)))
+    file = _SectorFile(crc=1)
+
+    cache.get_sector(file)
+
+    assert file.read_count == 1
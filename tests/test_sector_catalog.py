@@ -0,0 +1,54 @@
+from struct import Struct
+
+import pytest
+from clickhouse_cityhash.cityhash import CityHash64
+
+from filesystem import TsFileSystem
+from filesystem.TsDirectory import TsDirectory
+from filesystem.TsFile import TsFile
+from routing import TsRoadGraph
+from sectors import TsSectorCache, TsSectorCatalog
+from sectors.TsNode import TsNode
+from utils import TsMemoryBudget
+
+
+def _sector_file(path: str, node_uids: range) -> TsFile:
+    # A sector without items, followed by its nodes.
+    data = Struct("<I8sII").pack(898, b"euro2", 3, 0)
+    data += len(node_uids).to_bytes(4, "little")
+    for uid in node_uids:
+        data += TsNode.struct.pack(uid, 256 * uid, 0, 0, 1.0, 0.0, 0.0, 0.0, 0, 0)
+    return TsFile(CityHash64(path.strip("/")), lambda: data, crc=len(node_uids))
+
+
+@pytest.fixture
+def map_dir(monkeypatch) -> str:
+    monkeypatch.setattr(TsFileSystem, "_dirs", {})
+    monkeypatch.setattr(TsFileSystem, "_files", {})
+    map_dir = TsDirectory()
+    files = {}
+    for i, name in enumerate(["sec+0000+0000.base", "sec+0001+0000.base"]):
+        file = _sector_file(f"/map/europe/{name}", range(10 * i + 1, 10 * i + 4))
+        map_dir.file_names.add(name)
+        files[file.hash] = file
+    TsFileSystem._merge_source_file({CityHash64("map/europe"): map_dir}, files)
+    return "/map/europe"
+
+
+def test_stream_sectors_into_road_graph(map_dir, tmp_path):
+    budget = TsMemoryBudget(max_bytes=1)
+    catalog = TsSectorCatalog(
+        map_dir,
+        max_cache_bytes=1,
+        sector_cache=TsSectorCache(tmp_path),
+        memory_budget=budget,
+    )
+
+    sectors = catalog.stream_sectors()
+    graph = TsRoadGraph.from_sectors(sectors)
+
+    assert len(sectors) == 2
+    assert sorted(graph.node_uids) == [1, 2, 3, 11, 12, 13]
+    # The stream holds no sectors, and the budget evicted the cached one.
+    assert catalog.cache_bytes == 0
+    assert len(list(sectors)) == 2
@@ -0,0 +1,115 @@
+from array import array
+from types import SimpleNamespace
+
+import pytest
+
+from sectors.TsMapAreaItem import TsMapAreaItem
+from tiles import TsTile, TsTileExporter, TsTileLayerEnum
+from tiles.TsTile import _read_varint, _unzigzag, _write_varint, _zigzag
+
+
+@pytest.mark.parametrize("v", [0, 1, -1, 63, -64, 64, -65, 2**20, -(2**31)])
+def test_zigzag_varint_round_trip(v):
+    b = bytearray()
+    _write_varint(b, _zigzag(v))
+
+    assert _zigzag(v) >= 0
+    assert _read_varint(bytes(b), 0) == (_zigzag(v), len(b))
+    assert _unzigzag(_zigzag(v)) == v
+
+
+def test_tile_round_trip():
+    # Moves back and forth (negative deltas), leaves the tile, and jumps far
+    # enough for multi-byte varints.
+    polyline = array("d", [1000.0, 2000.0, 1500.0, 2900.0, 1100.0, 2100.0])
+    polyline += array("d", [500.0, 1500.0, 1999.0, 2999.0])
+    features = [
+        (TsTileLayerEnum.ROAD.value, 0, polyline),
+        (TsTileLayerEnum.MAP_AREA.value, 7, array("d", [1200.0, 2200.0] * 3)),
+    ]
+
+    data = TsTile.encode(features, 1000.0, 2000.0, 1000.0, 4096)
+    decoded = TsTile.decode(data)
+
+    assert [(layer, color) for layer, color, _ in decoded] == [
+        (TsTileLayerEnum.ROAD.value, 0),
+        (TsTileLayerEnum.MAP_AREA.value, 7),
+    ]
+    assert len(decoded[0][2]) == len(polyline)
+    # Points are quantized to 1000 / 4096 m.
+    assert max(abs(a - b) for a, b in zip(decoded[0][2], polyline)) <= 0.5 / 4.096
+    # Repeated points are dropped.
+    assert list(decoded[1][2]) == pytest.approx([1200.0, 2200.0], abs=0.5 / 4.096)
+
+
+def test_decode_rejects_other_format():
+    data = bytearray(TsTile.encode([], 0.0, 0.0, 1000.0, 4096))
+    data[:4] = b"XXXX"
+
+    with pytest.raises(ValueError):
+        TsTile.decode(bytes(data))
+
+
+def _sector(path: str, crc: int, x: float, z: float, size: float = 100.0):
+    # A sector holding one square map area with its corner at (x, z).
+    uid = crc * 10
+    corners = [(x, z), (x + size, z), (x + size, z + size), (x, z + size)]
+    nodes = {
+        uid + i: SimpleNamespace(uid=uid + i, x=cx, z=cz)
+        for i, (cx, cz) in enumerate(corners)
+    }
+    area = TsMapAreaItem(uid, array("Q", nodes), 1)
+    return SimpleNamespace(
+        path=path, crc=crc, nodes=nodes, roads=[], prefabs=[], map_areas=[area]
+    )
+
+
+def _exporter(out_dir) -> TsTileExporter:
+    return TsTileExporter(out_dir, max_zoom=2, tile_size=1000.0)
+
+
+def test_export_skips_unchanged_sectors(tmp_path):
+    sectors = [
+        _sector("/a.base", 1, 100.0, 100.0),
+        _sector("/b.base", 2, 3100.0, 3100.0),
+    ]
+    assert _exporter(tmp_path).export(sectors) > 0
+    # Mark a tile, so rewriting it would show.
+    tile_path = tmp_path / "2" / "0_0.tile"
+    tile_path.write_bytes(b"unchanged")
+
+    assert _exporter(tmp_path).export(sectors) == 0
+    assert tile_path.read_bytes() == b"unchanged"
+
+
+def test_export_rewrites_tiles_of_changed_sector(tmp_path):
+    a = _sector("/a.base", 1, 100.0, 100.0)
+    _exporter(tmp_path).export([a, _sector("/b.base", 2, 3100.0, 3100.0)])
+    (tmp_path / "2" / "0_0.tile").write_bytes(b"unchanged")
+
+    # Sector b moves from tile (3, 3) to tile (2, 3) of zoom 2.
+    tile_count = _exporter(tmp_path).export([a, _sector("/b.base", 3, 2100.0, 3100.0)])
+
+    # The old and new tiles of b at zoom 2 and their parents at zooms 1 and 0.
+    assert tile_count == 2 + 1 + 1
+    assert (tmp_path / "2" / "0_0.tile").read_bytes() == b"unchanged"
+    assert not (tmp_path / "2" / "3_3.tile").exists()
+    new_tile = TsTile.decode((tmp_path / "2" / "2_3.tile").read_bytes())
+    assert list(new_tile[0][2][:2]) == pytest.approx([2100.0, 3100.0], abs=0.5)
+    # The root tile holds the unchanged sector a and the moved sector b.
+    root = TsTile.decode((tmp_path / "0" / "0_0.tile").read_bytes())
+    assert sorted(feature[2][0] for feature in root) == pytest.approx(
+        [100.0, 2100.0], abs=1.0
+    )
+
+
+def test_export_removes_tiles_of_removed_sector(tmp_path):
+    a = _sector("/a.base", 1, 100.0, 100.0)
+    _exporter(tmp_path).export([a, _sector("/b.base", 2, 3100.0, 3100.0)])
+
+    _exporter(tmp_path).export([a])
+
+    assert not (tmp_path / "2" / "3_3.tile").exists()
+    assert (tmp_path / "2" / "0_0.tile").exists()
+    root = TsTile.decode((tmp_path / "0" / "0_0.tile").read_bytes())
+    assert [feature[2][0] for feature in root] == pytest.approx([100.0], abs=1.0)
@@ -0,0 +1,67 @@
+from array import array
+from types import SimpleNamespace
+
+from routing import TsEdgeEnum, TsRoadGraph, TsTurnTable
+from sectors.TsTrafficRuleItem import TsTrafficRuleItem
+from sectors.TsTrajectoryItem import TsTrajectoryItem
+from utils import TsToken
+
+
+def _two_path_graph() -> TsRoadGraph:
+    # A road 9 -> 0 (10 s) continuing on a fast road 0 -> 1 -> 2 (20 s) along z = 0
+    # or a slow road 0 -> 3 -> 2 (60 s) along z = 100.
+    # Nodes 4 to 7 are the corners of a traffic area around node 1,
+    # and node 8 is an AI path node next to node 1. They have no edges.
+    xs = [0.0, 100.0, 200.0, 100.0, 50.0, 150.0, 150.0, 50.0, 102.0, -100.0]
+    zs = [0.0, 0.0, 0.0, 100.0, -50.0, -50.0, 50.0, 50.0, 3.0, 0.0]
+    edges = []
+    for u, v, duration in [
+        (9, 0, 10.0),
+        (0, 1, 10.0),
+        (1, 2, 10.0),
+        (0, 3, 30.0),
+        (3, 2, 30.0),
+    ]:
+        edges.append((u, v, duration, duration, TsEdgeEnum.ROAD))
+        edges.append((v, u, duration, duration, TsEdgeEnum.ROAD))
+    return TsRoadGraph(range(100, 110), xs, zs, edges)
+
+
+def _sector(traffic_rules=(), trajectories=()) -> SimpleNamespace:
+    return SimpleNamespace(
+        traffic_rules=list(traffic_rules), trajectories=list(trajectories)
+    )
+
+
+def test_unrestricted_route():
+    graph = _two_path_graph()
+
+    table = TsTurnTable.from_sectors(graph, [_sector()], {"no_trucks": 1000.0})
+
+    assert graph.search_edges(9, 2, table)[2] == [9, 0, 1, 2]
+
+
+def test_traffic_area_changes_route():
+    graph = _two_path_graph()
+    area = TsTrafficRuleItem(
+        1, array("Q", [104, 105, 106, 107]), TsToken.encode("no_trucks"), 0.0
+    )
+
+    table = TsTurnTable.from_sectors(graph, [_sector([area])], {"no_trucks": 1000.0})
+
+    duration, _, nodes = graph.search_edges(9, 2, table)
+    assert nodes == [9, 0, 3, 2]
+    assert duration == 70.0
+
+
+def test_route_rule_snaps_to_road_node():
+    graph = _two_path_graph()
+    trajectory = TsTrajectoryItem(
+        2, array("Q", [108]), 0, [(0, TsToken.encode("no_trucks"))]
+    )
+
+    table = TsTurnTable.from_sectors(
+        graph, [_sector(trajectories=[trajectory])], {"no_trucks": 1000.0}
+    )
+
+    assert graph.search_edges(9, 2, table)[2] == [9, 0, 3, 2]
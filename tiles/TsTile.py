@@ -0,0 +1,146 @@
+from array import array
+from enum import Enum
+from struct import Struct
+
+# Version of the tile format.
+# Bump when it changes, to rebuild tiles exported by a TsTileExporter.
+TILE_FORMAT_VERSION = 1
+
+# magic, format version, extent, tile min x, tile min z, tile size, feature count
+_TILE_HEADER = Struct("<4sHHdddI")
+# layer, color, point count
+_FEATURE_HEADER = Struct("<BII")
+_MAGIC = b"TSTL"
+
+# (layer, color, polyline)
+TileFeature = tuple[int, int, array]
+
+
+class TsTileLayerEnum(Enum):
+    ROAD = 0
+    PREFAB = 1  # navigation curves through a prefab
+    MAP_AREA = 2  # closed polygon, the last point connects to the first
+
+
+class TsTile:
+    """
+    A static class used to encode and decode map tiles.
+    A tile is a square of the world holding the features that overlap it.
+    Points are quantized to an extent x extent grid over the tile,
+    and stored as zigzag varint deltas from the previous point.
+    Features are not clipped, so points may fall outside of the grid.
+    """
+
+    @staticmethod
+    def encode(
+        features: list[TileFeature],
+        min_x: float,
+        min_z: float,
+        size: float,
+        extent: int,
+    ) -> bytes:
+        """
+        Encode features into a tile.
+
+        Args:
+            features: The features, with world (x, z) polylines.
+            min_x: World x position of the tile's corner.
+            min_z: World z position of the tile's corner.
+            size: Width of the tile in world units.
+            extent: Number of grid units across the tile.
+
+        Returns:
+            The encoded tile.
+        """
+        scale = extent / size
+        b = bytearray(
+            _TILE_HEADER.pack(
+                _MAGIC, TILE_FORMAT_VERSION, extent, min_x, min_z, size, len(features)
+            )
+        )
+        for layer, color, polyline in features:
+            # Drop points that quantize onto the previous point.
+            points: list[int] = []
+            for i in range(0, len(polyline), 2):
+                qx = round((polyline[i] - min_x) * scale)
+                qz = round((polyline[i + 1] - min_z) * scale)
+                if not points or qx != points[-2] or qz != points[-1]:
+                    points += (qx, qz)
+
+            b += _FEATURE_HEADER.pack(layer, color, len(points) // 2)
+            prev_x = prev_z = 0
+            for i in range(0, len(points), 2):
+                qx, qz = points[i], points[i + 1]
+                _write_varint(b, _zigzag(qx - prev_x))
+                _write_varint(b, _zigzag(qz - prev_z))
+                prev_x, prev_z = qx, qz
+        return bytes(b)
+
+    @staticmethod
+    def decode(data: bytes) -> list[TileFeature]:
+        """
+        Decode the features of a tile.
+
+        Args:
+            data: The encoded tile.
+
+        Returns:
+            The features, with world (x, z) polylines.
+
+        Raises:
+            ValueError: The data is not a tile of the current format version.
+        """
+        (
+            magic,
+            version,
+            extent,
+            min_x,
+            min_z,
+            size,
+            feature_count,
+        ) = _TILE_HEADER.unpack_from(data)
+        if magic != _MAGIC or version != TILE_FORMAT_VERSION:
+            raise ValueError(f"Unsupported tile format '{magic}' version {version}.")
+
+        scale = size / extent
+        pos = _TILE_HEADER.size
+        features = []
+        for _ in range(feature_count):
+            layer, color, point_count = _FEATURE_HEADER.unpack_from(data, pos)
+            pos += _FEATURE_HEADER.size
+            polyline = array("d")
+            qx = qz = 0
+            for _ in range(point_count):
+                dx, pos = _read_varint(data, pos)
+                dz, pos = _read_varint(data, pos)
+                qx += _unzigzag(dx)
+                qz += _unzigzag(dz)
+                polyline.extend((min_x + qx * scale, min_z + qz * scale))
+            features.append((layer, color, polyline))
+        return features
+
+
+def _zigzag(v: int) -> int:
+    return v << 1 if v >= 0 else (-v << 1) - 1
+
+
+def _unzigzag(v: int) -> int:
+    return v >> 1 if not v & 1 else -((v + 1) >> 1)
+
+
+def _write_varint(b: bytearray, v: int) -> None:
+    while v >= 0x80:
+        b.append((v & 0x7F) | 0x80)
+        v >>= 7
+    b.append(v)
+
+
+def _read_varint(data: bytes, pos: int) -> tuple[int, int]:
+    v = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        v |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return v, pos
+        shift += 7
@@ -0,0 +1,336 @@
+import json
+import math
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterable
+
+from geometry import TsCurve, TsRoadGeometry
+from sectors import TsSector
+from sectors.TsNode import TsNode
+from sectors.TsSector import PARSER_VERSION
+from units import TsPrefabDescriptor
+from utils import TsMemoryBudget
+from .TsTile import TILE_FORMAT_VERSION, TileFeature, TsTile, TsTileLayerEnum
+
+_MANIFEST_NAME = "manifest.json"
+
+# (zoom, tile x, tile z, indices of the features overlapping the tile)
+TileJob = tuple[int, int, int, list[int]]
+
+_worker_features: list[TileFeature] = []
+
+
+class TsTileExporter:
+    """
+    Exports the roads, prefabs and map areas of parsed sectors
+    into a pyramid of TsTile files, at out_dir/<zoom>/<x>_<z>.tile.
+    Tiles at max_zoom are tile_size wide, and each lower zoom doubles the size.
+    Features are simplified to one grid unit of each zoom level,
+    and features smaller than a grid unit are dropped.
+    A manifest records the CRC of each exported sector and the tiles it touched,
+    so later exports only rewrite the tiles of changed sectors.
+    """
+
+    def __init__(
+        self,
+        out_dir: str | os.PathLike,
+        max_zoom: int = 8,
+        tile_size: float = 1000.0,
+        extent: int = 4096,
+        samples: int = 16,
+        memory_budget: TsMemoryBudget | None = None,
+    ):
+        """
+        Args:
+            out_dir: The directory to write tiles and the manifest to.
+            max_zoom: The most detailed zoom level (0 is the least detailed).
+            tile_size: Width of the tiles at max_zoom in m.
+            extent: Number of grid units across a tile.
+            samples: Number of points each curve is evaluated at before simplifying.
+            memory_budget: Optional budget shared with other components.
+                The cache of road polylines is registered in it.
+        """
+        self.out_dir = Path(out_dir)
+        self.max_zoom = max_zoom
+        self.tile_size = tile_size
+        self.extent = extent
+        self.samples = samples
+        self._road_geometry = TsRoadGeometry(samples)
+        if memory_budget:
+            memory_budget.register("road geometry", self._road_geometry)
+
+    def _config(self) -> list:
+        # Exported tiles are only reused if all of these match.
+        return [
+            TILE_FORMAT_VERSION,
+            PARSER_VERSION,
+            self.max_zoom,
+            self.tile_size,
+            self.extent,
+            self.samples,
+        ]
+
+    def export(
+        self,
+        sectors: Iterable[TsSector],
+        workers: int | None = 1,
+        batch_size: int = 64,
+    ) -> int:
+        """
+        Export the tiles of the sectors that changed since the last export.
+        Every sector of the map must be passed, since a rewritten tile
+        includes the features of all sectors that overlap it.
+
+        Args:
+            sectors: The parsed sectors (not headers_only). They are iterated twice
+                and not kept, so they can be streamed from a TsSectorCatalog.
+            workers: Number of processes to spread batches of tiles over.
+                1 runs in this process, and None uses all cores.
+            batch_size: Number of tiles sent to a worker at a time.
+
+        Returns:
+            The number of tiles written or removed.
+        """
+        manifest = self._read_manifest()
+        old_sectors: dict[str, dict] = manifest.get("sectors", {})
+        if manifest.get("config") != self._config():
+            self._remove_tiles()
+            old_sectors = {}
+
+        # Features may reference nodes stored in a neighbouring sector,
+        # so collect all nodes first.
+        nodes: dict[int, TsNode] = {}
+        changed_paths: set[str | None] = set()
+        paths: set[str | None] = set()
+        for sector in sectors:
+            nodes.update(sector.nodes)
+            paths.add(sector.path)
+            if (
+                sector.crc is None
+                or sector.path not in old_sectors
+                or old_sectors[sector.path]["crc"] != sector.crc
+            ):
+                changed_paths.add(sector.path)
+        removed_paths = old_sectors.keys() - paths
+        if not changed_paths and not removed_paths:
+            return 0
+
+        # Every feature is needed, since a changed sector's tiles
+        # may also hold features of unchanged sectors.
+        features: list[TileFeature] = []
+        feature_ranges: list[tuple[int, int, int, int]] = []
+        new_sectors: dict[str, dict] = {}
+        dirty: set[tuple[int, int]] = set()
+        for sector in sectors:
+            sector_features = self._sector_features(sector, nodes)
+            sector_tiles: set[tuple[int, int]] = set()
+            for feature in sector_features:
+                tile_range = self._tile_range(feature[2])
+                features.append(feature)
+                feature_ranges.append(tile_range)
+                min_tx, min_tz, max_tx, max_tz = tile_range
+                sector_tiles.update(
+                    (tx, tz)
+                    for tx in range(min_tx, max_tx + 1)
+                    for tz in range(min_tz, max_tz + 1)
+                )
+            if sector.path in changed_paths:
+                dirty |= sector_tiles
+            if sector.path is not None:
+                new_sectors[sector.path] = {
+                    "crc": sector.crc,
+                    "tiles": sorted(sector_tiles),
+                }
+        # Tiles that held features of changed or removed sectors.
+        for path in changed_paths | removed_paths:
+            if path in old_sectors:
+                dirty.update(tuple(tile) for tile in old_sectors[path]["tiles"])
+
+        jobs = self._tile_jobs(dirty, feature_ranges)
+        if workers is None:
+            workers = os.cpu_count() or 1
+        if workers <= 1 or len(jobs) <= batch_size:
+            _init_worker(features)
+            tile_count = _write_tiles(
+                jobs, self.out_dir, self.max_zoom, self.tile_size, self.extent
+            )
+            _init_worker([])
+        else:
+            batches = [
+                jobs[i : i + batch_size] for i in range(0, len(jobs), batch_size)
+            ]
+            with ProcessPoolExecutor(
+                max_workers=workers, initializer=_init_worker, initargs=(features,)
+            ) as executor:
+                tile_count = sum(
+                    executor.map(
+                        _write_tiles,
+                        batches,
+                        [self.out_dir] * len(batches),
+                        [self.max_zoom] * len(batches),
+                        [self.tile_size] * len(batches),
+                        [self.extent] * len(batches),
+                    )
+                )
+
+        self._write_manifest({"config": self._config(), "sectors": new_sectors})
+        return tile_count
+
+    def _sector_features(
+        self, sector: TsSector, nodes: dict[int, TsNode]
+    ) -> list[TileFeature]:
+        features: list[TileFeature] = []
+
+        self._road_geometry.update_sector(sector, nodes)
+        for road in sector.roads:
+            polyline = self._road_geometry.get(road.uid)
+            if polyline is not None:
+                features.append((TsTileLayerEnum.ROAD.value, 0, polyline))
+
+        curves = []
+        for prefab in sector.prefabs:
+            descriptor = TsPrefabDescriptor.get(prefab.model_token)
+            node = nodes.get(prefab.node_uids[0]) if prefab.node_uids else None
+            if (
+                not descriptor
+                or not node
+                or descriptor.node_count != len(prefab.node_uids)
+            ):
+                continue
+            points, dirs = descriptor.transform_curves(
+                node.x, node.z, node.yaw, prefab.origin
+            )
+            for i in range(0, len(points), 4):
+                start_x, start_z, end_x, end_z = points[i : i + 4]
+                d0x, d0z, d1x, d1z = dirs[i : i + 4]
+                chord = math.hypot(end_x - start_x, end_z - start_z)
+                curves.append(
+                    (
+                        start_x,
+                        start_z,
+                        d0x * chord,
+                        d0z * chord,
+                        end_x,
+                        end_z,
+                        d1x * chord,
+                        d1z * chord,
+                    )
+                )
+        for polyline in TsCurve.hermite_many(curves, self.samples):
+            features.append(
+                (
+                    TsTileLayerEnum.PREFAB.value,
+                    0,
+                    TsCurve.simplify(polyline, self._road_geometry.tolerance),
+                )
+            )
+
+        for map_area in sector.map_areas:
+            polygon = array("d")
+            for node_uid in map_area.node_uids:
+                node = nodes.get(node_uid)
+                if node:
+                    polygon.extend((node.x, node.z))
+            if len(polygon) >= 6:
+                features.append(
+                    (TsTileLayerEnum.MAP_AREA.value, map_area.color, polygon)
+                )
+        return features
+
+    def _tile_range(self, polyline: array) -> tuple[int, int, int, int]:
+        # (min x, min z, max x, max z) of the max_zoom tiles overlapping a polyline.
+        xs, zs = polyline[0::2], polyline[1::2]
+        return (
+            math.floor(min(xs) / self.tile_size),
+            math.floor(min(zs) / self.tile_size),
+            math.floor(max(xs) / self.tile_size),
+            math.floor(max(zs) / self.tile_size),
+        )
+
+    def _tile_jobs(
+        self,
+        dirty: set[tuple[int, int]],
+        feature_ranges: list[tuple[int, int, int, int]],
+    ) -> list[TileJob]:
+        # The features of every dirty tile, at every zoom level.
+        jobs: list[TileJob] = []
+        for zoom in range(self.max_zoom + 1):
+            shift = self.max_zoom - zoom
+            zoom_dirty = {(tx >> shift, tz >> shift) for tx, tz in dirty}
+            tile_features: dict[tuple[int, int], list[int]] = {
+                tile: [] for tile in zoom_dirty
+            }
+            for i, (min_tx, min_tz, max_tx, max_tz) in enumerate(feature_ranges):
+                for tx in range(min_tx >> shift, (max_tx >> shift) + 1):
+                    for tz in range(min_tz >> shift, (max_tz >> shift) + 1):
+                        feature_ids = tile_features.get((tx, tz))
+                        if feature_ids is not None:
+                            feature_ids.append(i)
+            jobs += [
+                (zoom, tx, tz, feature_ids)
+                for (tx, tz), feature_ids in sorted(tile_features.items())
+            ]
+        return jobs
+
+    def _read_manifest(self) -> dict:
+        try:
+            with open(self.out_dir / _MANIFEST_NAME) as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _write_manifest(self, manifest: dict) -> None:
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        # Write to a temporary file first, so a failed write can't corrupt it.
+        temp_path = self.out_dir / f"{_MANIFEST_NAME}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump(manifest, f)
+        os.replace(temp_path, self.out_dir / _MANIFEST_NAME)
+
+    def _remove_tiles(self) -> None:
+        for path in self.out_dir.glob("*/*.tile"):
+            path.unlink()
+
+
+def _init_worker(features: list[TileFeature]) -> None:
+    global _worker_features
+    _worker_features = features
+
+
+def _write_tiles(
+    jobs: list[TileJob], out_dir: Path, max_zoom: int, tile_size: float, extent: int
+) -> int:
+    # Each feature is simplified once per zoom level, however many tiles it is in.
+    simplified: dict[tuple[int, int], array | None] = {}
+    for zoom, tx, tz, feature_ids in jobs:
+        size = tile_size * (1 << (max_zoom - zoom))
+        tolerance = size / extent
+        tile_features = []
+        for i in feature_ids:
+            key = (zoom, i)
+            if key not in simplified:
+                simplified[key] = _simplify(_worker_features[i][2], tolerance)
+            polyline = simplified[key]
+            if polyline is not None:
+                layer, color, _ = _worker_features[i]
+                tile_features.append((layer, color, polyline))
+
+        path = out_dir / str(zoom) / f"{tx}_{tz}.tile"
+        if not tile_features:
+            path.unlink(missing_ok=True)
+            continue
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(
+            TsTile.encode(tile_features, tx * size, tz * size, size, extent)
+        )
+    return len(jobs)
+
+
+def _simplify(polyline: array, tolerance: float) -> array | None:
+    # Drop polylines smaller than the tolerance, and simplify the rest.
+    xs, zs = polyline[0::2], polyline[1::2]
+    if max(max(xs) - min(xs), max(zs) - min(zs)) < tolerance:
+        return None
+    return TsCurve.simplify(polyline, tolerance)
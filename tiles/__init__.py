@@ -0,0 +1,2 @@
+from .TsTile import TsTile, TsTileLayerEnum
+from .TsTileExporter import TsTileExporter
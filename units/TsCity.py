@@ -1,4 +1,5 @@
 from filesystem import TsFileSystem
+from utils import TsToken
 
 
 class TsCity:
@@ -34,3 +35,8 @@ class TsCity:
                 self.map_x_offsets.append(float(value))
             elif key == "map_y_offsets[]":
                 self.map_y_offsets.append(float(value))
+
+    @property
+    def token(self) -> int:
+        """The token used by city and company items (e.g. 'berlin' for city.berlin)."""
+        return TsToken.encode(self.unit_name.split(".")[-1])
@@ -0,0 +1,44 @@
+from filesystem import TsFileSystem
+from utils import TsToken
+
+
+class TsFerryConnection:
+    """
+    A ferry (or train) connection between two ports,
+    e.g. 'ferry_connection : conn.calais.dover'.
+    """
+
+    def __init__(self, file_path: str):
+        file = TsFileSystem.get_file(file_path)
+        if not file:
+            raise FileNotFoundError(
+                f"Could not find ferry connection file '{file_path}'"
+            )
+
+        self.unit_name = ""
+        self.start_port_token = 0
+        self.end_port_token = 0
+        self.price = 0.0
+        self.time = 0.0
+        self.distance = 0.0
+
+        lines = [line.strip() for line in file.read().decode("utf-8").splitlines()]
+        for line in lines:
+            if ":" not in line:
+                continue
+
+            split_parts = [i.strip(' "{') for i in line.split(":")]
+            key, value = split_parts[0], split_parts[1]
+            value = value.split(" ")[0]
+            if key == "ferry_connection":
+                # e.g. conn.calais.dover
+                self.unit_name = value
+                _, start_port, end_port = value.split(".")
+                self.start_port_token = TsToken.encode(start_port)
+                self.end_port_token = TsToken.encode(end_port)
+            elif key == "price":
+                self.price = float(value)
+            elif key == "time":
+                self.time = float(value)
+            elif key == "distance":
+                self.distance = float(value)
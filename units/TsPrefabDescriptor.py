@@ -0,0 +1,269 @@
+import heapq
+import math
+from array import array
+from dataclasses import dataclass
+from struct import Struct
+from typing import Self
+
+from filesystem import TsFileSystem
+from filesystem.TsFile import TsFile
+from utils import StructDataClass, TsMemory, TsToken
+
+
+@dataclass
+class _PpdHeader(StructDataClass):
+    struct = Struct("<III36xII")
+
+    version: int  # u4
+    node_count: int  # u4
+    nav_curve_count: int  # u4
+    # sign_count: int  # u4
+    # semaphore_count: int  # u4
+    # spawn_point_count: int  # u4
+    # terrain_point_count: int  # u4
+    # terrain_point_variant_count: int  # u4
+    # map_point_count: int  # u4
+    # trigger_point_count: int  # u4
+    # intersection_count: int  # u4
+    # nav_node_count: int  # u4
+    node_offset: int  # u4
+    nav_curve_offset: int  # u4
+
+    def __post_init__(self):
+        assert self.version >= 0x16
+
+
+# terrain_point_idx: u4, terrain_point_count: u4, variant_idx: u4, variant_count: u4
+# position: float3, direction: float3
+# input_lines: s4[8], output_lines: s4[8]
+_NODE_STRUCT = Struct("<16xf4xff4xf8i8i")
+
+# name: u8 -> token, flags: u4, leads_to_nodes: u4
+# start_position: float3, end_position: float3
+# start_rotation: quaternion (wxyz), end_rotation: quaternion (wxyz)
+# length: f4, next_lines: s4[4], prev_lines: s4[4]
+# next_line_count: u4, prev_line_count: u4
+# semaphore_id: s4, traffic_rule: u8 -> token
+_NAV_CURVE_STRUCT = Struct("<16xf4xff4xf8ff4i4iII12x")
+
+
+class TsPrefabDescriptor:
+    """
+    The navigation data of a prefab model, parsed from its .ppd descriptor.
+    All positions and directions are in the prefab's local (x, z) space.
+    Descriptors are shared by every placed instance of the model,
+    so they are loaded once per model and memoized by get().
+    """
+
+    _desc_paths: dict[int, str] = {}
+    """Maps a prefab model token to its .ppd file path."""
+    _cache: dict[int, Self | None] = {}
+    _cache_sizes: dict[int, int] = {}
+
+    def __init__(self, file_path: str):
+        file = TsFileSystem.get_file(file_path)
+        if not file:
+            raise FileNotFoundError(f"Could not find prefab descriptor '{file_path}'")
+        b = file.read()
+        header = _PpdHeader.parse(b[: _PpdHeader.struct.size])
+
+        # Per node: x, z, yaw of the node direction.
+        self.nodes = array("d")
+        self._node_input_lines: list[list[int]] = []
+        self._node_output_lines: list[list[int]] = []
+        node_bytes = b[
+            header.node_offset : header.node_offset
+            + _NODE_STRUCT.size * header.node_count
+        ]
+        for node in _NODE_STRUCT.iter_unpack(node_bytes):
+            x, z, dir_x, dir_z = node[:4]
+            self.nodes.extend((x, z, math.atan2(-dir_x, -dir_z)))
+            self._node_input_lines.append([i for i in node[4:12] if i >= 0])
+            self._node_output_lines.append([i for i in node[12:20] if i >= 0])
+
+        # Per curve: start x, z, end x, z, then start dir x, z, end dir x, z.
+        self.curve_points = array("d")
+        self.curve_dirs = array("d")
+        self.curve_lengths = array("d")
+        self._curve_next_lines: list[list[int]] = []
+        curve_bytes = b[
+            header.nav_curve_offset : header.nav_curve_offset
+            + _NAV_CURVE_STRUCT.size * header.nav_curve_count
+        ]
+        for curve in _NAV_CURVE_STRUCT.iter_unpack(curve_bytes):
+            start_x, start_z, end_x, end_z = curve[:4]
+            self.curve_points.extend((start_x, start_z, end_x, end_z))
+            self.curve_dirs.extend((*_forward(*curve[4:8]), *_forward(*curve[8:12])))
+            self.curve_lengths.append(curve[12])
+            next_line_count = curve[21]
+            self._curve_next_lines.append(list(curve[13 : 13 + next_line_count]))
+
+        self.node_links = self._find_node_links()
+
+    @property
+    def node_count(self) -> int:
+        return len(self.nodes) // 3
+
+    @property
+    def curve_count(self) -> int:
+        return len(self.curve_lengths)
+
+    def _find_node_links(self) -> list[tuple[int, int, float]]:
+        # Shortest chain of curves from each entry node to every exit node.
+        exit_nodes: dict[int, list[int]] = {}
+        for node, output_lines in enumerate(self._node_output_lines):
+            for curve in output_lines:
+                exit_nodes.setdefault(curve, []).append(node)
+
+        links = []
+        for start_node, input_lines in enumerate(self._node_input_lines):
+            lengths: dict[int, float] = {}
+            heap = [(self.curve_lengths[c], c) for c in input_lines]
+            heapq.heapify(heap)
+            while heap:
+                length, curve = heapq.heappop(heap)
+                if curve in lengths:
+                    continue
+                lengths[curve] = length
+                for next_curve in self._curve_next_lines[curve]:
+                    if next_curve not in lengths:
+                        heapq.heappush(
+                            heap, (length + self.curve_lengths[next_curve], next_curve)
+                        )
+
+            end_lengths: dict[int, float] = {}
+            for curve, length in lengths.items():
+                for end_node in exit_nodes.get(curve, []):
+                    if end_node != start_node and length < end_lengths.get(
+                        end_node, math.inf
+                    ):
+                        end_lengths[end_node] = length
+            links += [(start_node, n, length) for n, length in end_lengths.items()]
+        return links
+
+    def transform_curves(
+        self, origin_x: float, origin_z: float, origin_yaw: float, origin: int
+    ) -> tuple[array, array]:
+        """
+        Transform the navigation curves into world space for a placed instance.
+
+        Args:
+            origin_x: World x position of the instance's first node.
+            origin_z: World z position of the instance's first node.
+            origin_yaw: Yaw of the instance's first node.
+            origin: Index of the descriptor node placed at the first node.
+
+        Returns:
+            The world curve points and directions,
+            in the same layout as curve_points and curve_dirs.
+        """
+        local_x, local_z, local_yaw = self.nodes[3 * origin : 3 * origin + 3]
+        angle = origin_yaw - local_yaw
+        cos, sin = math.cos(angle), math.sin(angle)
+
+        xs, zs = self.curve_points[0::2], self.curve_points[1::2]
+        points = array("d", bytes(8 * len(self.curve_points)))
+        points[0::2] = array(
+            "d",
+            (
+                origin_x + (x - local_x) * cos + (z - local_z) * sin
+                for x, z in zip(xs, zs)
+            ),
+        )
+        points[1::2] = array(
+            "d",
+            (
+                origin_z - (x - local_x) * sin + (z - local_z) * cos
+                for x, z in zip(xs, zs)
+            ),
+        )
+
+        dir_xs, dir_zs = self.curve_dirs[0::2], self.curve_dirs[1::2]
+        dirs = array("d", bytes(8 * len(self.curve_dirs)))
+        dirs[0::2] = array("d", (x * cos + z * sin for x, z in zip(dir_xs, dir_zs)))
+        dirs[1::2] = array("d", (-x * sin + z * cos for x, z in zip(dir_xs, dir_zs)))
+        return points, dirs
+
+    @classmethod
+    def parse_def_file(cls, file: TsFile) -> None:
+        """
+        Register the .ppd paths of the prefab models defined in a def file
+        (e.g. /def/world/prefab.sii).
+
+        Args:
+            file: The def file.
+        """
+        # TODO: Try to determine encoding
+        try:
+            lines = [line.strip() for line in file.read().decode("utf-8").splitlines()]
+        except:
+            lines = [line.strip() for line in file.read().decode("cp437").splitlines()]
+
+        model_token: int | None = None
+        for line in lines:
+            if line.startswith("prefab_model"):
+                # e.g. prefab_model : prefab.dlc_fr_12
+                unit_name = line.split(":")[1].strip(" {")
+                model_token = TsToken.encode(unit_name.split(".", 1)[1])
+            elif line.startswith("prefab_desc") and model_token is not None:
+                cls._desc_paths[model_token] = line.split(":")[1].strip(' "')
+
+    @classmethod
+    def get(cls, model_token: int) -> Self | None:
+        """
+        Get the descriptor of a prefab model, loading it on first use.
+
+        Args:
+            model_token: The prefab model token.
+
+        Returns:
+            The descriptor, or None if the model or its .ppd file is unknown.
+        """
+        if model_token in cls._cache:
+            return cls._cache[model_token]
+
+        desc_path = cls._desc_paths.get(model_token)
+        descriptor = None
+        if desc_path:
+            try:
+                descriptor = cls(desc_path)
+            except (AssertionError, FileNotFoundError):
+                print(f"Could not parse prefab descriptor '{desc_path}'.")
+        cls._cache[model_token] = descriptor
+        cls._cache_sizes[model_token] = TsMemory.deep_size(descriptor)
+        return descriptor
+
+    @classmethod
+    def memory_usage(cls) -> dict[str, int]:
+        """
+        Get the memory held by the loaded descriptors.
+
+        Returns:
+            The bytes held by the descriptors and their registered paths.
+        """
+        return {
+            "descriptors": sum(cls._cache_sizes.values()),
+            "desc_paths": TsMemory.sampled_size(
+                cls._desc_paths.items(), len(cls._desc_paths)
+            ),
+        }
+
+    @classmethod
+    def evict(cls) -> int | None:
+        """
+        Unload the descriptor that was loaded first.
+        It is loaded again by get() when needed.
+
+        Returns:
+            The bytes released, or None if no descriptors are loaded.
+        """
+        if not cls._cache:
+            return None
+        model_token = next(iter(cls._cache))
+        del cls._cache[model_token]
+        return cls._cache_sizes.pop(model_token)
+
+
+def _forward(w: float, x: float, y: float, z: float) -> tuple[float, float]:
+    # Rotate (0, 0, -1) by the quaternion, and drop the y component.
+    return -2 * (x * z + w * y), -(1 - 2 * (x * x + y * y))
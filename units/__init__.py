@@ -1 +1,3 @@
 from .TsCity import TsCity
+from .TsPrefabDescriptor import TsPrefabDescriptor
+from .TsFerryConnection import TsFerryConnection
@@ -0,0 +1,92 @@
+import io
+import itertools
+import sys
+import types
+from array import array
+from typing import Iterable
+
+# Objects that hold no references to other objects that should be counted.
+_LEAF_TYPES = (str, bytes, bytearray, array, int, float, bool, range, type(None))
+# Objects that are shared rather than owned, e.g. the archive a TsFile reads from.
+_SKIPPED_TYPES = (type, types.ModuleType, io.IOBase)
+
+
+class TsMemory:
+    """
+    A static class used to estimate the memory held by Python objects.
+    Sizes are approximate: objects shared between calls are counted by each call,
+    and classes, modules and open files are not counted.
+    """
+
+    @staticmethod
+    def deep_size(obj: object) -> int:
+        """
+        Estimate the size of an object and everything it references,
+        following containers, instance dicts and function defaults.
+
+        Args:
+            obj: The object.
+
+        Returns:
+            The size in bytes.
+        """
+        seen: set[int] = set()
+        stack = [obj]
+        size = 0
+        while stack:
+            o = stack.pop()
+            if id(o) in seen or isinstance(o, _SKIPPED_TYPES):
+                continue
+            seen.add(id(o))
+            size += sys.getsizeof(o)
+
+            if isinstance(o, _LEAF_TYPES):
+                continue
+            if isinstance(o, dict):
+                stack += o.keys()
+                stack += o.values()
+            elif isinstance(o, (list, tuple, set, frozenset)):
+                stack += o
+            elif isinstance(o, types.FunctionType):
+                # e.g. the archive entry bound to a TsFile read function.
+                stack += o.__defaults__ or ()
+            elif hasattr(o, "__dict__"):
+                # Attribute names are interned and shared by every instance.
+                size += sys.getsizeof(o.__dict__)
+                stack += o.__dict__.values()
+        return size
+
+    @staticmethod
+    def sampled_size(objs: Iterable, count: int, sample_size: int = 100) -> int:
+        """
+        Estimate the total deep size of many similar objects from the first few.
+
+        Args:
+            objs: The objects.
+            count: The number of objects.
+            sample_size: The number of objects to measure.
+
+        Returns:
+            The estimated size in bytes.
+        """
+        sample = list(itertools.islice(objs, sample_size))
+        if not sample:
+            return 0
+        return sum(TsMemory.deep_size(o) for o in sample) * count // len(sample)
+
+    @staticmethod
+    def format_bytes(size: int) -> str:
+        """
+        Format a size for display.
+
+        Args:
+            size: The size in bytes.
+
+        Returns:
+            The size in the largest fitting unit (e.g. '12.3 MiB').
+        """
+        for unit in ("B", "KiB", "MiB", "GiB"):
+            if abs(size) < 1024 or unit == "GiB":
+                break
+            size /= 1024
+        return f"{size:.1f} {unit}" if unit != "B" else f"{size} B"
@@ -0,0 +1,121 @@
+import sys
+from typing import Protocol
+
+from .TsMemory import TsMemory
+
+
+class MemoryComponent(Protocol):
+    def memory_usage(self) -> dict[str, int]:
+        """Get the bytes held by each part of the component."""
+        ...
+
+
+class TsMemoryBudget:
+    """
+    Reports the memory held by registered components,
+    and keeps it under a limit by evicting from them.
+    A component is evictable if it also has an evict() method,
+    which releases one entry and returns the bytes released,
+    or None once nothing is left.
+    The largest evictable component is evicted from first.
+    Static classes (e.g. TsFileSystem) can be registered as components.
+
+    The budget keeps the last measured total of each component,
+    so checking the limit is cheap. Components which track their own size
+    pass it to update() as it changes; the others are measured again
+    by report(), which enforce() only calls once the limit is exceeded.
+    """
+
+    def __init__(self, max_bytes: int = sys.maxsize):
+        """
+        Args:
+            max_bytes: Approximate memory limit of all components.
+        """
+        self.max_bytes = max_bytes
+        self._components: dict[str, MemoryComponent] = {}
+        self._evictable: set[str] = set()
+        self._totals: dict[str, int] = {}
+
+    def register(
+        self, name: str, component: MemoryComponent, evictable: bool = True
+    ) -> None:
+        """
+        Args:
+            name: The name of the component in reports.
+            component: The component.
+            evictable: Whether the budget may evict from the component.
+                Pass False for components whose entries are still referenced
+                elsewhere, since evicting them would release nothing.
+        """
+        self._components[name] = component
+        if evictable and hasattr(component, "evict"):
+            self._evictable.add(name)
+        self._totals[name] = sum(component.memory_usage().values())
+
+    def update(self, name: str, total_bytes: int) -> None:
+        """
+        Record the current memory held by a component.
+
+        Args:
+            name: The name of the component.
+            total_bytes: The bytes held by all parts of the component.
+        """
+        self._totals[name] = total_bytes
+
+    def report(self) -> dict[str, dict[str, int]]:
+        """
+        Measure the memory held by every component.
+
+        Returns:
+            Maps each component name to the bytes held by each of its parts.
+        """
+        report = {
+            name: component.memory_usage()
+            for name, component in self._components.items()
+        }
+        self._totals = {name: sum(usage.values()) for name, usage in report.items()}
+        return report
+
+    def total_bytes(self) -> int:
+        """
+        Get the memory held by all components, as last measured or updated.
+        """
+        return sum(self._totals.values())
+
+    def enforce(self) -> int:
+        """
+        Evict from components until their memory is under the limit.
+
+        Returns:
+            The number of entries evicted.
+        """
+        if self.total_bytes() <= self.max_bytes:
+            return 0
+
+        self.report()
+        total = self.total_bytes()
+        evictable = set(self._evictable)
+        eviction_count = 0
+        while total > self.max_bytes and evictable:
+            name = max(evictable, key=self._totals.__getitem__)
+            released = self._components[name].evict()
+            if released is None:
+                evictable.remove(name)
+                continue
+            eviction_count += 1
+            self._totals[name] -= released
+            total -= released
+
+        if total > self.max_bytes:
+            print(
+                f"Memory budget of {TsMemory.format_bytes(self.max_bytes)} "
+                f"exceeded by {TsMemory.format_bytes(total - self.max_bytes)}, "
+                "with nothing left to evict."
+            )
+        return eviction_count
+
+    def print_report(self) -> None:
+        for name, usage in self.report().items():
+            print(f"{name}: {TsMemory.format_bytes(sum(usage.values()))}")
+            for part, size in usage.items():
+                print(f"    {part}: {TsMemory.format_bytes(size)}")
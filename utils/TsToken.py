@@ -0,0 +1,51 @@
+_CHARS = "\0" + "0123456789abcdefghijklmnopqrstuvwxyz_"
+
+
+class TsToken:
+    """
+    A static class used to convert SCS tokens.
+    A token is a string of up to 12 characters from [0-9a-z_],
+    packed into a u8 in base 38.
+    """
+
+    @staticmethod
+    def decode(token: int) -> str:
+        """
+        Convert a token to its string.
+
+        Args:
+            token: The u8 token.
+
+        Returns:
+            The token string (e.g. 'berlin').
+        """
+        chars = []
+        while token:
+            token, i = divmod(token, len(_CHARS))
+            chars.append(_CHARS[i])
+        return "".join(chars)
+
+    @staticmethod
+    def encode(name: str) -> int:
+        """
+        Convert a string to its token.
+
+        Args:
+            name: The token string (e.g. 'berlin').
+
+        Returns:
+            The u8 token.
+
+        Raises:
+            ValueError: The string is not a valid token.
+        """
+        if len(name) > 12:
+            raise ValueError(f"Token '{name}' is longer than 12 characters.")
+
+        token = 0
+        for c in reversed(name.lower()):
+            i = _CHARS.find(c, 1)
+            if i < 0:
+                raise ValueError(f"Token '{name}' contains invalid character '{c}'.")
+            token = token * len(_CHARS) + i
+        return token
@@ -1 +1,4 @@
 from .StructDataClass import StructDataClass
+from .TsToken import TsToken
+from .TsMemory import TsMemory
+from .TsMemoryBudget import TsMemoryBudget